@@ -54,6 +54,12 @@ def copy_all_files(source_dir: Path, monitor_dir: Path, base_dir: Path):
         dest_file.chmod(0o644)
         print(f"   ✓ {py_file.name}")
     
+    # Optional mypyc-compiled modules; Python imports them ahead of the .py
+    for ext_file in list(source_package.glob('*.so')) + list(source_package.glob('*.pyd')):
+        dest_file = lib_dir / ext_file.name
+        shutil.copy2(ext_file, dest_file)
+        print(f"   ✓ {ext_file.name} (compiled)")
+    
     # Create hook entry points in hooks/
     hooks_dir = monitor_dir / 'hooks'
     
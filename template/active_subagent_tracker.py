@@ -39,6 +39,11 @@ class ActiveSubagentTracker:
     Uses file-based persistence for cross-process communication.
     """
     
+    # Last state read or written by this instance, and the state file
+    # contents it was parsed from
+    _state_cache: Optional[Dict[str, Any]] = None
+    _state_cache_raw: Optional[bytes] = None
+    
     def __init__(self, state_file: str = None):
         if state_file is None:
             # Check for global installation first
@@ -55,17 +60,34 @@ class ActiveSubagentTracker:
         self.state_file = state_file
         self.lock_file = state_file + '.lock'
         
+    @staticmethod
+    def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy state deep enough that callers can modify the copy freely."""
+        return {**state, "active_subagents": [dict(s) for s in state.get("active_subagents", [])]}
+    
     def _read_state(self) -> Dict[str, List[Dict]]:
-        """Read current state from file with locking."""
+        """
+        Read current state from file with locking.
+        
+        The whole file is still read on every call; the cache only saves
+        parsing it again when its contents are unchanged. Each call returns
+        its own copy of the state.
+        """
         if not os.path.exists(self.state_file):
             return {"active_subagents": [], "last_updated": 0}
         
         with open(self.lock_file, 'w') as lock:
             fcntl.flock(lock.fileno(), fcntl.LOCK_SH)
             try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
+                with open(self.state_file, 'rb') as f:
+                    raw = f.read()
+                if self._state_cache is None or raw != self._state_cache_raw:
+                    state = json.loads(raw)
+                    self._state_cache = state
+                    self._state_cache_raw = raw
+                return self._copy_state(self._state_cache)
+            except (json.JSONDecodeError, UnicodeDecodeError, IOError):
+                self._state_cache = self._state_cache_raw = None
                 return {"active_subagents": [], "last_updated": 0}
             finally:
                 fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
@@ -76,8 +98,15 @@ class ActiveSubagentTracker:
             fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
             try:
                 state["last_updated"] = int(time.time())
-                with open(self.state_file, 'w') as f:
-                    json.dump(state, f, indent=2)
+                raw = json.dumps(state, indent=2).encode()
+                with open(self.state_file, 'wb') as f:
+                    f.write(raw)
+                # What was just written is the current state
+                self._state_cache = self._copy_state(state)
+                self._state_cache_raw = raw
+            except BaseException:
+                self._state_cache = self._state_cache_raw = None
+                raise
             finally:
                 fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
     
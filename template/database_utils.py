@@ -11,6 +11,26 @@ import time
 from typing import Dict, Any, List, Optional, Tuple
 from contextlib import contextmanager
 
+# Optional C-accelerated JSON for hook input and responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Expected mcp_correlations layout (column -> declared type), checked on startup
+MCP_CORRELATION_COLUMNS = {
+    'id': 'INTEGER',
+    'timestamp': 'INTEGER',
+    'tool_name_id': 'INTEGER',
+    'param_hash': 'TEXT',
+    'session_id': 'TEXT',
+    'agent_type_id': 'INTEGER',
+    'agent_confidence': 'REAL',
+    'matched': 'BOOLEAN',
+    'matched_at': 'INTEGER',
+    'created_at': 'TIMESTAMP',
+}
+
 class SubagentTracker:
     def __init__(self, db_path: str = None):
         """Initialize the subagent tracker with database path."""
@@ -111,24 +131,33 @@ class SubagentTracker:
         -- MCP Correlation Table
         CREATE TABLE IF NOT EXISTS mcp_correlations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp REAL NOT NULL,
-            tool_name TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,  -- ns since epoch
+            tool_name_id INTEGER NOT NULL,  -- mcp_correlation_names.id
             param_hash TEXT NOT NULL,
-            param_preview TEXT,
             session_id TEXT NOT NULL,
-            agent_type TEXT,
+            agent_type_id INTEGER,  -- mcp_correlation_names.id
             agent_confidence REAL,
             matched BOOLEAN DEFAULT 0,
-            matched_at REAL,
+            matched_at INTEGER,  -- ns since epoch
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             
-            -- Additional context
+            -- Indexing for fast lookup
+            UNIQUE(tool_name_id, param_hash, timestamp)
+        );
+
+        -- Tool and agent names used by mcp_correlations
+        CREATE TABLE IF NOT EXISTS mcp_correlation_names (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+
+        -- Additional context, kept out of the hot lookup table
+        CREATE TABLE IF NOT EXISTS mcp_correlation_meta (
+            id INTEGER PRIMARY KEY,  -- mcp_correlations.id
             project_path TEXT,
             user_message TEXT,
-            sequence_num INTEGER,
-            
-            -- Indexing for fast lookup
-            UNIQUE(tool_name, param_hash, timestamp)
+            param_preview TEXT,
+            sequence_num INTEGER
         );
 
         -- Indexes
@@ -139,7 +168,12 @@ class SubagentTracker:
         CREATE INDEX IF NOT EXISTS idx_tool_usage_session ON subagent_tool_usage(subagent_session_id);
         CREATE INDEX IF NOT EXISTS idx_message_stats_session ON subagent_message_stats(subagent_session_id);
         CREATE INDEX IF NOT EXISTS idx_errors_session ON subagent_errors(subagent_session_id);
-        CREATE INDEX IF NOT EXISTS idx_correlation_lookup ON mcp_correlations(tool_name, param_hash, timestamp);
+        -- Covering index: retrieve_correlation is answered from the index alone
+        DROP INDEX IF EXISTS idx_correlation_lookup;
+        CREATE INDEX IF NOT EXISTS idx_correlation_cover ON mcp_correlations(
+            tool_name_id, param_hash, matched, timestamp,
+            session_id, agent_type_id, agent_confidence
+        );
         CREATE INDEX IF NOT EXISTS idx_correlation_cleanup ON mcp_correlations(created_at);
         CREATE INDEX IF NOT EXISTS idx_correlation_session ON mcp_correlations(session_id);
 
@@ -180,9 +214,21 @@ class SubagentTracker:
         '''
         
         with self.get_connection() as conn:
+            self._migrate_correlation_tables(conn)
             conn.executescript(schema_sql)
             conn.commit()
     
+    def _migrate_correlation_tables(self, conn: sqlite3.Connection):
+        """Drop the MCP correlation tables if they were created with an older layout.
+        
+        Correlations only live for a minute, so recreating them loses nothing.
+        """
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(mcp_correlations)")}
+        if columns and columns != MCP_CORRELATION_COLUMNS:
+            conn.execute("DROP TABLE IF EXISTS mcp_correlations")
+            conn.execute("DROP TABLE IF EXISTS mcp_correlation_meta")
+            conn.execute("DROP TABLE IF EXISTS mcp_correlation_names")
+    
     def start_subagent(self, session_id: str, subagent_type: str, transcript_path: str = None, cwd: str = None) -> int:
         """Mark a subagent as started and return the database ID."""
         start_time = int(time.time())
@@ -444,13 +490,56 @@ def extract_subagent_type(tool_input: Dict[str, Any]) -> Optional[str]:
     
     return 'unknown'
 
+# Transcript path -> (inode, bytes counted, mtime_ns, newline count, last byte)
+_line_count_cache: Dict[str, Tuple[int, int, int, int, bytes]] = {}
+
+def count_transcript_lines(transcript_path: str) -> int:
+    """
+    Count lines in a transcript without decoding it.
+    
+    Matches iterating the file in text mode: a final line without a
+    trailing newline still counts as a line. Transcripts are append-only,
+    so counts are cached per path and a grown file only has its new tail
+    scanned.
+    """
+    with open(transcript_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        cached = _line_count_cache.get(transcript_path)
+        
+        if cached and cached[0] == st.st_ino and (
+                cached[1] < st.st_size or
+                (cached[1] == st.st_size and cached[2] == st.st_mtime_ns)):
+            _, offset, _, newlines, last_byte = cached
+            # Cheap sanity check that the counted prefix is still in place
+            f.seek(offset - 1 if offset else 0)
+            if offset and f.read(1) != last_byte:
+                f.seek(0)
+                offset, newlines, last_byte = 0, 0, b''
+        else:
+            offset, newlines, last_byte = 0, 0, b''
+        
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            newlines += chunk.count(b'\n')
+            offset += len(chunk)
+            last_byte = chunk[-1:]
+    
+    _line_count_cache[transcript_path] = (st.st_ino, offset, st.st_mtime_ns, newlines, last_byte)
+    
+    if last_byte and last_byte != b'\n':
+        newlines += 1
+    
+    return newlines
+
 # Utility functions for Claude Code hook integration
 def read_hook_input() -> Dict[str, Any]:
     """Read JSON input from stdin (Claude Code hook format)."""
     import sys
     try:
+        if orjson is not None and hasattr(sys.stdin, 'buffer'):
+            return orjson.loads(sys.stdin.buffer.read())
         return json.loads(sys.stdin.read())
     except json.JSONDecodeError as e:
+        # Also raised by orjson, whose error subclasses it
         print(f"Error parsing hook input: {e}", file=sys.stderr)
         return {}
 
@@ -459,18 +548,43 @@ def write_hook_response(response: Dict[str, Any] = None, exit_code: int = 0):
     import sys
     
     if response:
-        print(json.dumps(response))
+        # stdout may be a text-only replacement without a byte buffer
+        buffer = getattr(sys.stdout, 'buffer', None)
+        if orjson is not None and buffer is not None:
+            # Write the encoded bytes directly, after anything already printed
+            sys.stdout.flush()
+            buffer.write(orjson.dumps(response, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
+            buffer.flush()
+        else:
+            print(json.dumps(response))
     
     sys.exit(exit_code)
 
+def _format_log(message: str, data: Optional[Dict[str, Any]], timestamp: str) -> str:
+    log_msg = f"[{timestamp}] SUBAGENT_TRACKER: {message}"
+    
+    if data:
+        # default=str: a log line must never raise, least of all from a
+        # deferred batch
+        log_msg += f" | Data: {json.dumps(data, indent=2, default=str)}"
+    
+    return log_msg
+
 def log_debug(message: str, data: Dict[str, Any] = None):
     """Log debug information to stderr for Claude Code."""
     import sys
     
     timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-    log_msg = f"[{timestamp}] SUBAGENT_TRACKER: {message}"
+    print(_format_log(message, data, timestamp), file=sys.stderr)
+
+def log_debug_batch(entries: List[Tuple[str, Optional[Dict[str, Any]]]]):
+    """Log several (message, data) entries to stderr in a single write."""
+    import sys
     
-    if data:
-        log_msg += f" | Data: {json.dumps(data, indent=2)}"
+    if not entries:
+        return
     
-    print(log_msg, file=sys.stderr)
\ No newline at end of file
+    timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+    sys.stderr.write(''.join(_format_log(message, data, timestamp) + '\n'
+                             for message, data in entries))
+    sys.stderr.flush()
\ No newline at end of file
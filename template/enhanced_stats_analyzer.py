@@ -14,6 +14,10 @@ class EnhancedStatsAnalyzer:
     """Analyzes subagent conversations for enhanced statistics."""
     
     def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Forget the files seen by earlier analyses."""
         self.file_operations = {
             'created': set(),
             'modified': set(),
@@ -5,13 +5,122 @@ Enables MCPs to identify their caller without protocol modifications.
 """
 
 import os
+import sys
 import json
 import time
+import queue
+import atexit
 import hashlib
 import sqlite3
-from typing import Dict, Any, Optional, List
+from array import array
+from typing import Dict, Any, Optional, List, Tuple, FrozenSet
 from datetime import datetime, timedelta
-from threading import Lock
+from threading import Lock, Thread
+
+# SQL text is kept constant so sqlite3's per-connection statement cache
+# can reuse the compiled statements across calls
+_INSERT_NAME_SQL = 'INSERT OR IGNORE INTO mcp_correlation_names (name) VALUES (?)'
+
+_NAME_ID_SQL = 'SELECT id FROM mcp_correlation_names WHERE name = ?'
+
+_NAME_SQL = 'SELECT name FROM mcp_correlation_names WHERE id = ?'
+
+_INSERT_SQL = '''
+    INSERT OR IGNORE INTO mcp_correlations 
+    (timestamp, tool_name_id, param_hash,
+     session_id, agent_type_id, agent_confidence)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+_INSERT_META_SQL = '''
+    INSERT OR IGNORE INTO mcp_correlation_meta
+    (id, project_path, user_message, param_preview, sequence_num)
+    SELECT id, ?, ?, ?, ?
+    FROM mcp_correlations
+    WHERE tool_name_id = ? AND param_hash = ? AND timestamp = ?
+'''
+
+_MARK_MATCHED_BY_KEY_SQL = '''
+    UPDATE mcp_correlations
+    SET matched = 1, matched_at = ?
+    WHERE tool_name_id = ? AND param_hash = ? AND timestamp = ?
+      AND matched = 0
+'''
+
+_FIND_SQL = '''
+    SELECT id, timestamp, session_id, agent_type_id, agent_confidence
+    FROM mcp_correlations
+    WHERE tool_name_id = ?
+      AND param_hash = ?
+      AND timestamp > ?
+      AND timestamp <= ?
+      AND matched = 0
+    ORDER BY timestamp DESC
+    LIMIT 1
+'''
+
+_META_SQL = '''
+    SELECT project_path, user_message, sequence_num, param_preview
+    FROM mcp_correlation_meta
+    WHERE id = ?
+'''
+
+_MARK_MATCHED_BY_ID_SQL = '''
+    UPDATE mcp_correlations
+    SET matched = 1, matched_at = ?
+    WHERE id = ?
+'''
+
+_PENDING_TOOLS_SQL = '''
+    SELECT DISTINCT tool_name_id
+    FROM mcp_correlations
+    WHERE matched = 0
+'''
+
+_DATA_VERSION_SQL = 'PRAGMA data_version'
+
+_CLEANUP_META_SQL = '''
+    DELETE FROM mcp_correlation_meta
+    WHERE id IN (SELECT id FROM mcp_correlations WHERE timestamp < ?)
+'''
+
+_CLEANUP_SQL = '''
+    DELETE FROM mcp_correlations
+    WHERE timestamp < ?
+'''
+
+_STATS_SQL = '''
+    SELECT 
+        COUNT(*) as total,
+        SUM(matched) as matched,
+        COUNT(DISTINCT session_id) as unique_sessions,
+        COUNT(DISTINCT agent_type_id) as unique_agents,
+        MIN(timestamp) as oldest,
+        MAX(timestamp) as newest
+    FROM mcp_correlations
+'''
+
+_RECENT_SQL = '''
+    SELECT t.name, m.param_preview, c.session_id, a.name,
+           c.matched, c.timestamp, c.matched_at
+    FROM mcp_correlations c
+    JOIN mcp_correlation_names t ON t.id = c.tool_name_id
+    LEFT JOIN mcp_correlation_names a ON a.id = c.agent_type_id
+    LEFT JOIN mcp_correlation_meta m ON m.id = c.id
+    ORDER BY c.timestamp DESC
+    LIMIT ?
+'''
+
+_CACHED_STATEMENTS = 64
+
+# Timestamps are stored as integer nanoseconds since the epoch
+_NS_PER_SEC = 1_000_000_000
+
+# Reused encoders for param normalization; json.dumps would build a new
+# JSONEncoder on every call because of the non-default arguments
+_dumps_sorted = json.JSONEncoder(sort_keys=True, separators=(',', ':')).encode
+_dumps_unsorted = json.JSONEncoder(separators=(',', ':')).encode
+
 
 class MCPCorrelationService:
     """
@@ -32,13 +141,46 @@ class MCPCorrelationService:
             os.makedirs(data_dir, exist_ok=True)
             db_path = os.path.join(data_dir, 'subagents.db')
         
-        self.db_path = db_path
-        self.lock = Lock()
+        # Attributes are annotated so the module can be compiled with mypyc
+        self.db_path: str = db_path
+        self.lock: Lock = Lock()
         self._init_database()
         
         # Configuration
-        self.time_window = 5.0  # seconds to match correlation
-        self.cleanup_interval = 60  # seconds to keep old correlations
+        self.time_window: float = 5.0  # seconds to match correlation
+        self.cleanup_interval: float = 60  # seconds to keep old correlations
+        
+        # In-process cache of correlations stored by this process. SQLite remains
+        # the source of truth since the PreToolUse hook and the MCP server usually
+        # run in separate processes. Rows are kept as parallel arrays in insertion
+        # order; _cache_index maps (tool_name, param_hash) to a row and rows
+        # before _cache_head have expired.
+        self._cache_ts: array = array('q')
+        self._cache_keys: List[Tuple[str, str]] = []
+        self._cache_rows: List[Tuple] = []
+        self._cache_index: Dict[Tuple[str, str], int] = {}
+        self._cache_head: int = 0
+        
+        # Inserts are handed to a background writer so the PreToolUse hook
+        # doesn't wait on SQLite. The thread is started on first use.
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer: Optional[Thread] = None
+        self._write_batch_size: int = 64
+        self._flush_timeout: float = 5.0  # seconds flush() waits for the writer
+        
+        # Reads and match updates share one connection, used under self.lock
+        self._conn: Optional[sqlite3.Connection] = None
+        
+        # Tool and agent names are stored as ids into mcp_correlation_names.
+        # Rows there are never deleted, so both directions can be cached. These
+        # hold committed names only and are used under self.lock; the writer
+        # keeps its own cache and publishes new names here after each commit.
+        self._name_ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        
+        # Ids of tools with unmatched rows, as of _data_version on self._conn
+        self._pending_tools: FrozenSet[int] = frozenset()
+        self._data_version: Optional[int] = None
     
     def _init_database(self):
         """Ensure database exists with proper schema."""
@@ -59,24 +201,29 @@ class MCPCorrelationService:
         finally:
             conn.close()
     
-    def compute_param_hash(self, params: Any) -> str:
+    def _normalize_params(self, params: Any) -> bytes:
         """
-        Compute deterministic hash of parameters.
+        Serialize parameters to the canonical bytes that get hashed.
         Handles nested structures and ensures consistent ordering.
         """
-        # Normalize params to ensure consistent hashing
         if params is None:
             normalized = ""
         elif isinstance(params, dict):
             # Sort keys for deterministic ordering
-            normalized = json.dumps(params, sort_keys=True, separators=(',', ':'))
+            normalized = _dumps_sorted(params)
         elif isinstance(params, (list, tuple)):
-            normalized = json.dumps(params, separators=(',', ':'))
+            normalized = _dumps_unsorted(params)
         else:
             normalized = str(params)
-        
+        return normalized.encode()
+    
+    def compute_param_hash(self, params: Any) -> str:
+        """
+        Compute deterministic hash of parameters.
+        Handles nested structures and ensures consistent ordering.
+        """
         # Use SHA-256 for strong collision resistance
-        return hashlib.sha256(normalized.encode()).hexdigest()
+        return hashlib.sha256(self._normalize_params(params)).hexdigest()
     
     def store_correlation(self, 
                          tool_name: str,
@@ -93,36 +240,36 @@ class MCPCorrelationService:
         Returns:
             Correlation ID for debugging
         """
-        timestamp = time.time()
-        param_hash = self.compute_param_hash(params)
+        timestamp = time.time_ns()
+        normalized = self._normalize_params(params)
+        param_hash = hashlib.sha256(normalized).hexdigest()
         
-        # Create preview for debugging (first 200 chars of params)
-        param_preview = str(params)[:200] if params else ""
+        # Preview for debugging: first 200 bytes of the already-serialized params
+        param_preview = normalized[:200].decode('utf-8', 'replace') if params else ""
         
         with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute('''
-                    INSERT OR REPLACE INTO mcp_correlations 
-                    (timestamp, tool_name, param_hash, param_preview,
-                     session_id, agent_type, agent_confidence,
-                     project_path, user_message, sequence_num)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (timestamp, tool_name, param_hash, param_preview,
-                      session_id, agent_type, agent_confidence,
-                      project_path, user_message, sequence_num))
-                
-                conn.commit()
-                correlation_id = f"{tool_name}:{param_hash[:8]}:{timestamp:.3f}"
-                
-                # Cleanup old correlations
-                self._cleanup_old_correlations(conn)
-                
-                return correlation_id
+            self._start_writer()
+            self._write_q.put((timestamp, tool_name, param_hash,
+                               session_id, agent_type, agent_confidence,
+                               project_path, user_message, param_preview, sequence_num))
+            correlation_id = f"{tool_name}:{param_hash[:8]}:{timestamp / _NS_PER_SEC:.3f}"
+            
+            key = (sys.intern(tool_name), param_hash)
+            self._cache_index[key] = len(self._cache_ts)
+            self._cache_ts.append(timestamp)
+            self._cache_keys.append(key)
+            self._cache_rows.append((session_id, agent_type, agent_confidence,
+                                     project_path, user_message, sequence_num,
+                                     param_preview))
+            self._expire_cache(timestamp)
+            
+            return correlation_id
     
     def retrieve_correlation(self, 
                            tool_name: str,
                            params: Any,
-                           mark_matched: bool = True) -> Optional[Dict[str, Any]]:
+                           mark_matched: bool = True,
+                           with_meta: bool = True) -> Optional[Dict[str, Any]]:
         """
         Retrieve correlation context for MCP tool call.
         
@@ -130,44 +277,68 @@ class MCPCorrelationService:
             tool_name: Name of the MCP tool
             params: Parameters passed to tool
             mark_matched: Whether to mark correlation as matched (prevents reuse)
+            with_meta: Whether to load project_path, user_message, sequence_num
+                and param_preview (left as None otherwise)
         
         Returns:
             Context dict with session_id, agent_type, etc. or None
         """
-        current_time = time.time()
+        current_time = time.time_ns()
         param_hash = self.compute_param_hash(params)
         
+        # Our own pending inserts must land before we query or update them
+        self.flush()
+        
         with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                # Find matching correlation within time window
-                cursor = conn.execute('''
-                    SELECT id, timestamp, session_id, agent_type, agent_confidence,
-                           project_path, user_message, sequence_num, param_preview
-                    FROM mcp_correlations
-                    WHERE tool_name = ?
-                      AND param_hash = ?
-                      AND timestamp > ?
-                      AND timestamp <= ?
-                      AND matched = 0
-                    ORDER BY timestamp DESC
-                    LIMIT 1
-                ''', (tool_name, param_hash, 
-                      current_time - self.time_window, current_time))
+            # Correlations stored by this process are served from memory
+            self._expire_cache(current_time)
+            key = (tool_name, param_hash)
+            i = self._cache_index.get(key)
+            if i is not None:
+                timestamp = self._cache_ts[i]
+                row = self._cache_rows[i]
+                if not mark_matched:
+                    return self._build_context(row, timestamp, current_time, with_meta)
                 
-                row = cursor.fetchone()
+                with self._connection() as conn:
+                    # Guard on matched = 0 in case another process consumed it
+                    cursor = conn.execute(_MARK_MATCHED_BY_KEY_SQL,
+                                          (current_time, self._lookup_name_id(conn, tool_name),
+                                           param_hash, timestamp))
+                # Only forget the entry once SQLite agrees it is matched. If no
+                # row was updated (consumed elsewhere, or still queued for the
+                # writer) the entry is kept and SQLite is asked again next time.
+                if cursor.rowcount:
+                    del self._cache_index[key]
+                    return self._build_context(row, timestamp, current_time, with_meta)
+            
+            with self._connection() as conn:
+                # Most MCP tools are never tracked; skip the lookup for those
+                tool_name_id = self._lookup_name_id(conn, tool_name)
+                if tool_name_id is None or not self._has_pending(conn, tool_name_id):
+                    return None
+                
+                # Find matching correlation within time window
+                # fetchall() runs the statement to completion so the persistent
+                # connection doesn't keep holding a read lock afterwards
+                rows = conn.execute(_FIND_SQL, (tool_name_id, param_hash,
+                                                current_time - int(self.time_window * _NS_PER_SEC),
+                                                current_time)).fetchall()
+                row = rows[0] if rows else None
                 
                 if row:
-                    (correlation_id, timestamp, session_id, agent_type, agent_confidence,
-                     project_path, user_message, sequence_num, param_preview) = row
+                    correlation_id, timestamp, session_id, agent_type_id, agent_confidence = row
+                    agent_type = self._lookup_name(conn, agent_type_id)
+                    
+                    project_path = user_message = sequence_num = param_preview = None
+                    if with_meta:
+                        meta = conn.execute(_META_SQL, (correlation_id,)).fetchall()
+                        if meta:
+                            project_path, user_message, sequence_num, param_preview = meta[0]
                     
                     # Mark as matched if requested
                     if mark_matched:
-                        conn.execute('''
-                            UPDATE mcp_correlations
-                            SET matched = 1, matched_at = ?
-                            WHERE id = ?
-                        ''', (current_time, correlation_id))
-                        conn.commit()
+                        conn.execute(_MARK_MATCHED_BY_ID_SQL, (current_time, correlation_id))
                     
                     # Return context
                     return {
@@ -177,70 +348,245 @@ class MCPCorrelationService:
                         'project_path': project_path,
                         'user_message': user_message,
                         'sequence_num': sequence_num,
-                        'correlation_age': current_time - timestamp,
+                        'correlation_age': (current_time - timestamp) / _NS_PER_SEC,
                         'param_preview': param_preview
                     }
                 
                 return None
     
+    def _build_context(self, row: Tuple, timestamp: int, current_time: int,
+                       with_meta: bool = True) -> Dict[str, Any]:
+        """Build the retrieve_correlation result from a cached row."""
+        (session_id, agent_type, agent_confidence,
+         project_path, user_message, sequence_num, param_preview) = row
+        return {
+            'session_id': session_id,
+            'agent_type': agent_type,
+            'agent_confidence': agent_confidence,
+            'project_path': project_path if with_meta else None,
+            'user_message': user_message if with_meta else None,
+            'sequence_num': sequence_num if with_meta else None,
+            'correlation_age': (current_time - timestamp) / _NS_PER_SEC,
+            'param_preview': param_preview if with_meta else None
+        }
+    
+    def _expire_cache(self, current_time: int):
+        """Evict cached correlations that fell out of the match window."""
+        cutoff = current_time - int(self.time_window * _NS_PER_SEC)
+        ts, keys, rows, index = self._cache_ts, self._cache_keys, self._cache_rows, self._cache_index
+        head, end = self._cache_head, len(ts)
+        while head < end and ts[head] <= cutoff:
+            key = keys[head]
+            # The key may have been re-stored since; only evict the stale row
+            if index.get(key) == head:
+                del index[key]
+            head += 1
+        
+        # Drop the expired prefix once it dominates the arrays
+        if head > 256 and head * 2 > end:
+            del ts[:head], keys[:head], rows[:head]
+            for key in index:
+                index[key] -= head
+            head = 0
+        self._cache_head = head
+    
+    def _has_pending(self, conn: sqlite3.Connection, tool_name_id: int) -> bool:
+        """Whether the tool may have an unmatched correlation.
+        
+        The set of pending tools is only reloaded when PRAGMA data_version shows
+        that another connection (the hook, or our own writer) has committed.
+        Matches made on this connection only shrink the real set, so the cached
+        one stays a safe superset.
+        """
+        version = conn.execute(_DATA_VERSION_SQL).fetchall()[0][0]
+        if version != self._data_version:
+            self._pending_tools = frozenset(
+                row[0] for row in conn.execute(_PENDING_TOOLS_SQL).fetchall())
+            self._data_version = version
+        return tool_name_id in self._pending_tools
+    
+    @staticmethod
+    def _name_id(conn: sqlite3.Connection, name: str,
+                 name_ids: Dict[str, int], added: Dict[str, int]) -> int:
+        """
+        Return the id for name, adding it to mcp_correlation_names if needed.
+        
+        Used by the writer with its own name_ids cache. Ids looked up in the
+        current transaction are also recorded in added.
+        """
+        name_id = name_ids.get(name)
+        if name_id is None:
+            conn.execute(_INSERT_NAME_SQL, (name,))
+            name_id = conn.execute(_NAME_ID_SQL, (name,)).fetchall()[0][0]
+            name_ids[name] = name_id
+            added[name] = name_id
+        return name_id
+    
+    def _lookup_name_id(self, conn: sqlite3.Connection, name: str) -> Optional[int]:
+        """Return the id for name, or None if it was never stored."""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            rows = conn.execute(_NAME_ID_SQL, (name,)).fetchall()
+            if not rows:
+                return None
+            name_id = rows[0][0]
+            self._name_ids[name] = name_id
+            self._names[name_id] = name
+        return name_id
+    
+    def _lookup_name(self, conn: sqlite3.Connection, name_id: Optional[int]) -> Optional[str]:
+        """Return the name stored under name_id."""
+        if name_id is None:
+            return None
+        name = self._names.get(name_id)
+        if name is None:
+            rows = conn.execute(_NAME_SQL, (name_id,)).fetchall()
+            if not rows:
+                return None
+            name = rows[0][0]
+            self._names[name_id] = name
+            self._name_ids[name] = name_id
+        return name
+    
+    def _start_writer(self):
+        """Start the background writer thread if it isn't running."""
+        if self._writer is None:
+            # The hook process exits right after storing; drain before it does
+            atexit.register(self.flush)
+        elif self._writer.is_alive():
+            return
+        # Start it, or restart it if it died, so queued writes don't pile up
+        self._writer = Thread(target=self._writer_loop,
+                              name='mcp-correlation-writer', daemon=True)
+        self._writer.start()
+    
+    def _writer_loop(self):
+        """Drain queued correlations into SQLite, one commit per batch."""
+        conn: Optional[sqlite3.Connection] = None
+        name_ids: Dict[str, int] = {}
+        while True:
+            batch = [self._write_q.get()]
+            while len(batch) < self._write_batch_size:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if conn is None:
+                    conn = sqlite3.connect(self.db_path, cached_statements=_CACHED_STATEMENTS)
+                added: Dict[str, int] = {}
+                rows = []
+                metas = []
+                for (timestamp, tool_name, param_hash, session_id, agent_type,
+                     agent_confidence, project_path, user_message, param_preview,
+                     sequence_num) in batch:
+                    tool_name_id = self._name_id(conn, tool_name, name_ids, added)
+                    agent_type_id = (self._name_id(conn, agent_type, name_ids, added)
+                                     if agent_type else None)
+                    rows.append((timestamp, tool_name_id, param_hash,
+                                 session_id, agent_type_id, agent_confidence))
+                    metas.append((project_path, user_message, param_preview, sequence_num,
+                                  tool_name_id, param_hash, timestamp))
+                conn.executemany(_INSERT_SQL, rows)
+                conn.executemany(_INSERT_META_SQL, metas)
+                
+                # Cleanup old correlations
+                self._cleanup_old_correlations(conn)
+                conn.commit()
+                
+                # The new names are committed; share them with readers
+                if added:
+                    with self.lock:
+                        for name, name_id in added.items():
+                            self._name_ids[name] = name_id
+                            self._names[name_id] = name
+            except Exception as e:
+                # Drop the connection; the next batch reconnects. Names added in
+                # the rolled-back transaction no longer exist.
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+                    conn = None
+                name_ids.clear()
+                print(f"Failed to store {len(batch)} MCP correlation(s): {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Return the persistent read connection. Caller must hold self.lock."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                         cached_statements=_CACHED_STATEMENTS)
+        return self._conn
+    
+    def flush(self) -> bool:
+        """
+        Wait until all queued correlations are written.
+        
+        Waits at most self._flush_timeout seconds so a hook never hangs on
+        the writer. Returns False if writes were still pending.
+        """
+        q = self._write_q
+        with q.all_tasks_done:
+            if not q.unfinished_tasks:
+                return True
+        with self.lock:
+            self._start_writer()
+        deadline = time.monotonic() + self._flush_timeout
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"Gave up waiting for {q.unfinished_tasks} MCP correlation write(s)",
+                          file=sys.stderr)
+                    return False
+                q.all_tasks_done.wait(remaining)
+        return True
+    
     def _cleanup_old_correlations(self, conn: sqlite3.Connection):
         """Remove correlations older than cleanup interval."""
-        cutoff_time = time.time() - self.cleanup_interval
-        conn.execute('''
-            DELETE FROM mcp_correlations
-            WHERE timestamp < ?
-        ''', (cutoff_time,))
+        cutoff_time = time.time_ns() - int(self.cleanup_interval * _NS_PER_SEC)
+        conn.execute(_CLEANUP_META_SQL, (cutoff_time,))
+        conn.execute(_CLEANUP_SQL, (cutoff_time,))
     
     def get_stats(self) -> Dict[str, Any]:
         """Get correlation service statistics."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(matched) as matched,
-                    COUNT(DISTINCT session_id) as unique_sessions,
-                    COUNT(DISTINCT agent_type) as unique_agents,
-                    MIN(timestamp) as oldest,
-                    MAX(timestamp) as newest
-                FROM mcp_correlations
-            ''')
-            
-            row = cursor.fetchone()
+        self.flush()
+        with self.lock:
+            row = self._connection().execute(_STATS_SQL).fetchall()[0]
             
-            current_time = time.time()
+            current_time = time.time_ns()
             return {
                 'total_correlations': row[0],
                 'matched_correlations': row[1] or 0,
                 'unique_sessions': row[2],
                 'unique_agents': row[3],
-                'oldest_age': current_time - row[4] if row[4] else None,
-                'newest_age': current_time - row[5] if row[5] else None,
+                'oldest_age': (current_time - row[4]) / _NS_PER_SEC if row[4] else None,
+                'newest_age': (current_time - row[5]) / _NS_PER_SEC if row[5] else None,
                 'time_window': self.time_window,
                 'cleanup_interval': self.cleanup_interval
             }
     
     def debug_recent_correlations(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent correlations for debugging."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT tool_name, param_preview, session_id, agent_type,
-                       matched, timestamp, matched_at
-                FROM mcp_correlations
-                ORDER BY timestamp DESC
-                LIMIT ?
-            ''', (limit,))
+        self.flush()
+        with self.lock:
+            rows = self._connection().execute(_RECENT_SQL, (limit,)).fetchall()
             
             results = []
-            current_time = time.time()
-            for row in cursor:
+            current_time = time.time_ns()
+            for row in rows:
                 results.append({
                     'tool_name': row[0],
-                    'param_preview': row[1][:50] + '...' if len(row[1]) > 50 else row[1],
+                    'param_preview': row[1][:50] + '...' if row[1] and len(row[1]) > 50 else row[1],
                     'session_id': row[2][:8] + '...' if len(row[2]) > 8 else row[2],
                     'agent_type': row[3],
                     'matched': bool(row[4]),
-                    'age': f"{current_time - row[5]:.1f}s ago",
-                    'matched_delay': f"{row[6] - row[5]:.3f}s" if row[6] else None
+                    'age': f"{(current_time - row[5]) / _NS_PER_SEC:.1f}s ago",
+                    'matched_delay': f"{(row[6] - row[5]) / _NS_PER_SEC:.3f}s" if row[6] else None
                 })
             
             return results
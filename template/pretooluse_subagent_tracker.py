@@ -6,22 +6,70 @@ Detects Task tool invocations and tracks active subagents.
 
 import sys
 import os
+import json
 
-from database_utils import SubagentTracker, read_hook_input, write_hook_response, log_debug, extract_subagent_type
-from active_subagent_tracker import ActiveSubagentTracker
-from mcp_correlation_service import store_mcp_context
+from database_utils import (read_hook_input, write_hook_response, log_debug,
+                            extract_subagent_type, count_transcript_lines)
+
+# Shared tracker instances, reused across hook calls in a long-lived process
+_db_tracker = None
+_active_tracker = None
+
+# Task-only modules are imported lazily so MCP tool calls don't pay for them
+def get_db_tracker():
+    """Get or create the shared database tracker."""
+    global _db_tracker
+    if _db_tracker is None:
+        from database_utils import SubagentTracker
+        _db_tracker = SubagentTracker()
+    return _db_tracker
+
+def get_active_tracker():
+    """Get or create the shared active subagent tracker."""
+    global _active_tracker
+    if _active_tracker is None:
+        from active_subagent_tracker import ActiveSubagentTracker
+        _active_tracker = ActiveSubagentTracker()
+    return _active_tracker
 
 def main():
     """Main hook execution function."""
-    try:
-        # Read hook input from Claude Code
-        hook_data = read_hook_input()
-        
-        if not hook_data:
-            log_debug("No hook data received")
-            write_hook_response(exit_code=0)
-            return
+    if '--daemon' in sys.argv[1:]:
+        serve()
+        return
+    
+    # Read hook input from Claude Code
+    hook_data = read_hook_input()
+    
+    if not hook_data:
+        log_debug("No hook data received")
+        write_hook_response(exit_code=0)
+        return
+    
+    write_hook_response(handle_hook(hook_data), exit_code=0)
+
+def serve():
+    """
+    Process hook payloads from stdin in a loop, one JSON object per line.
+    
+    Keeps trackers and database state alive across calls; each payload
+    gets one line of JSON response on stdout ({} when there is nothing to say).
+    """
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            hook_data = json.loads(line)
+        except json.JSONDecodeError as e:
+            log_debug(f"Error parsing hook input: {e}")
+            hook_data = None
         
+        response = handle_hook(hook_data) if hook_data else None
+        print(json.dumps(response or {}), flush=True)
+
+def handle_hook(hook_data):
+    """Handle a single PreToolUse payload. Returns the hook response or None."""
+    try:
         # Extract relevant information
         session_id = hook_data.get('session_id')
         tool_name = hook_data.get('tool_name')
@@ -40,6 +88,7 @@ def main():
             try:
                 # Get current agent context using the unified detection
                 from subagent_context import get_current_agent
+                from mcp_correlation_service import store_mcp_context
                 current_agent, current_confidence = get_current_agent(session_id)
                 
                 # Store correlation
@@ -64,30 +113,26 @@ def main():
                 log_debug(f"Error storing MCP correlation: {e}")
             
             # MCP tools don't need further processing
-            write_hook_response(exit_code=0)
-            return
+            return None
         
         # Process Task tool calls (subagent invocations)
         if tool_name != 'Task':
             # This shouldn't happen with proper matchers
             log_debug(f"Unexpected tool in hook: {tool_name}")
-            write_hook_response(exit_code=0)
-            return
+            return None
         
         # Extract subagent type from tool input
         subagent_type = extract_subagent_type(tool_input)
         
         if not subagent_type or subagent_type == 'unknown':
             log_debug("Could not extract subagent type from tool input", tool_input)
-            write_hook_response(exit_code=0)
-            return
+            return None
         
         # Get task details
         description = tool_input.get('description', '')
         prompt = tool_input.get('prompt', '')
         
-        # Initialize database tracker
-        db_tracker = SubagentTracker()
+        db_tracker = get_db_tracker()
         
         # Create subagent session record in database
         try:
@@ -110,15 +155,14 @@ def main():
         
         # Register with active subagent tracker for reliable stop detection
         try:
-            active_tracker = ActiveSubagentTracker()
+            active_tracker = get_active_tracker()
             
             # Try to get line number from transcript position
             task_line_number = 0
             if transcript_path and os.path.exists(transcript_path):
                 try:
-                    with open(transcript_path, 'r') as f:
-                        task_line_number = sum(1 for _ in f)
-                except:
+                    task_line_number = count_transcript_lines(transcript_path)
+                except OSError:
                     pass
             
             tracking_id = active_tracker.register_start(
@@ -150,12 +194,12 @@ def main():
             "message": f"🤖 Tracking subagent '{subagent_type}' (DB: {subagent_session_id}, Track: {tracking_id})"
         }
         
-        write_hook_response(response, exit_code=0)
+        return response
         
     except Exception as e:
         log_debug(f"PreToolUse hook error: {e}")
         # Don't block tool execution on hook errors
-        write_hook_response(exit_code=0)
+        return None
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,11 +5,88 @@ Uses active tracking, transcript analysis, and heuristics.
 """
 
 import os
+import re
+import mmap
 import json
 import time
-from typing import Dict, Any, Optional, Tuple
+import functools
+from typing import Dict, Any, Optional, Tuple, List
 from active_subagent_tracker import ActiveSubagentTracker, ActiveSubagent
 from sidechain_reconstructor import SidechainReconstructor
+from database_utils import count_transcript_lines
+
+# Number of trailing transcript lines inspected for sidechain activity
+TAIL_LINES = 20
+
+# Phrases suggesting a subagent wrapped up its work, matched case-insensitively
+_COMPLETION_RE = re.compile(
+    r'task complete|finished|returning to main|completed successfully|done|task accomplished',
+    re.IGNORECASE
+)
+
+_EMPTY: Dict[str, Any] = {}
+
+
+def _message_text(entry: Dict[str, Any]) -> str:
+    """
+    Return the text of a transcript entry's message.
+    
+    Content is either a string or a list of items, which are text strings or
+    dicts like {'type': 'text', 'text': ...}; only the text is kept rather than
+    str() of the whole structure.
+    """
+    message = entry.get('message') or _EMPTY
+    content = message.get('content') if isinstance(message, dict) else None
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            if isinstance(item, dict):
+                item = item.get('text')
+            if isinstance(item, str):
+                parts.append(item)
+        return '\n'.join(parts)
+    return '' if content is None else str(content)
+
+
+def _read_tail_lines(path: str, count: int) -> List[bytes]:
+    """
+    Return the last `count` lines of a file without reading the whole file.
+    
+    The file is memory-mapped and scanned backwards for newlines, so only the
+    pages holding those lines are touched and only they are copied out.
+    """
+    with open(path, 'rb') as f:
+        if count <= 0 or os.fstat(f.fileno()).st_size == 0:
+            return []  # Zero-length files can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            if mm[end - 1] == 0x0A:
+                end -= 1  # Trailing newline
+            lines = []
+            while len(lines) < count:
+                start = mm.rfind(b'\n', 0, end) + 1
+                lines.append(mm[start:end])
+                if start == 0:
+                    break
+                end = start - 1
+    lines.reverse()
+    return lines
+
+
+@functools.lru_cache(maxsize=32)
+def _get_reconstructor(path: str, mtime_ns: int, size: int) -> SidechainReconstructor:
+    """
+    Load a transcript and match its sidechain roots, memoized on the file signature.
+    
+    mtime_ns and size are only part of the cache key, so any write to the
+    transcript produces a fresh reconstructor.
+    """
+    reconstructor = SidechainReconstructor(path)
+    reconstructor.load_transcript()
+    reconstructor.match_roots_to_tasks()
+    return reconstructor
 
 class RobustSubagentDetector:
     """
@@ -21,8 +98,8 @@ class RobustSubagentDetector:
     3. Timing and pattern heuristics (fallback)
     """
     
-    def __init__(self):
-        self.tracker = ActiveSubagentTracker()
+    def __init__(self, tracker: Optional[ActiveSubagentTracker] = None):
+        self.tracker = tracker if tracker is not None else ActiveSubagentTracker()
         
     def detect_stopped_subagent(self, hook_data: Dict[str, Any]) -> Tuple[Optional[str], float, Dict[str, Any]]:
         """
@@ -44,7 +121,8 @@ class RobustSubagentDetector:
             'detection_method': [],
             'active_candidates': 0,
             'transcript_hints': {},
-            'selected_tracking_id': None
+            'selected_tracking_id': None,
+            'fast_path': False  # Picked the only active candidate without reading the transcript
         }
         
         # Strategy 1: Check active subagent tracker
@@ -56,6 +134,16 @@ class RobustSubagentDetector:
             details['detection_method'].append('no_active_tracked')
             return None, 0.0, details
         
+        if len(active_subagents) == 1:
+            # Only one candidate: confidence is 1.0 whatever the transcript says,
+            # so skip reading it
+            only = active_subagents[0]
+            details['selected_tracking_id'] = only.tracking_id
+            details['detection_method'].append('active_tracker')
+            details['fast_path'] = True
+            self.tracker.mark_completing(only.tracking_id)
+            return only.subagent_type, 1.0, details
+        
         # Strategy 2: Get hints from transcript if available
         transcript_hints = {}
         if transcript_path and os.path.exists(transcript_path):
@@ -102,46 +190,40 @@ class RobustSubagentDetector:
         
         try:
             # Quick scan of last few lines for sidechain activity
-            with open(transcript_path, 'r') as f:
-                lines = f.readlines()
+            total_lines = count_transcript_lines(transcript_path)
+            lines = _read_tail_lines(transcript_path, TAIL_LINES)
+            first_line = total_lines - len(lines) + 1
             
-            # Check last 20 lines for sidechain messages
-            for i in range(len(lines) - 1, max(0, len(lines) - 20) - 1, -1):
+            # Check last lines for sidechain messages
+            for i in range(len(lines) - 1, -1, -1):
+                # Cheap prefilter: only lines mentioning isSidechain can match
+                if b'"isSidechain"' not in lines[i]:
+                    continue
                 try:
                     entry = json.loads(lines[i])
                     
                     if entry.get('isSidechain'):
                         # Found a sidechain message
-                        hints['last_sidechain_line'] = i + 1
+                        hints['last_sidechain_line'] = first_line + i
                         
                         # Try to identify subagent type from chain reconstruction
-                        reconstructor = SidechainReconstructor(transcript_path)
-                        reconstructor.load_transcript()
-                        chains = reconstructor.reconstruct_all_subagent_chains()
+                        st = os.stat(transcript_path)
+                        reconstructor = _get_reconstructor(
+                            transcript_path, st.st_mtime_ns, st.st_size)
                         
                         # Find which chain contains this message
-                        entry_uuid = entry.get('uuid')
-                        for chain_info in chains:
-                            for msg in chain_info['messages']:
-                                if msg.get('uuid') == entry_uuid:
-                                    hints['last_sidechain_type'] = chain_info['subagent_type']
-                                    break
-                            if 'last_sidechain_type' in hints:
-                                break
+                        subagent_type = reconstructor.subagent_type_for_uuid(entry.get('uuid'))
+                        if subagent_type is not None:
+                            hints['last_sidechain_type'] = subagent_type
                         
                         # Check for completion patterns
-                        msg_content = str(entry.get('message', {}).get('content', '')).lower()
-                        completion_patterns = [
-                            'task complete', 'finished', 'returning to main',
-                            'completed successfully', 'done', 'task accomplished'
-                        ]
-                        
-                        if any(pattern in msg_content for pattern in completion_patterns):
+                        if _COMPLETION_RE.search(_message_text(entry)):
                             hints['has_completion_pattern'] = True
                         
                         break  # Stop after finding first sidechain message
                         
-                except (json.JSONDecodeError, KeyError):
+                except (ValueError, KeyError):
+                    # ValueError covers JSONDecodeError and invalid UTF-8
                     continue
                     
         except Exception as e:
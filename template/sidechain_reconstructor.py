@@ -5,89 +5,288 @@ Rebuilds complete subagent conversation chains using UUID linking and prompt mat
 """
 
 import json
-from typing import Dict, List, Optional, Set, Tuple
+import logging
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional C-accelerated parsers; both are drop-in for what the loader needs
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    from ciso8601 import parse_datetime as _parse_datetime
+except ImportError:
+    def _parse_datetime(timestamp_str: str) -> datetime:
+        return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+
+# Read buffer for streaming transcript lines; large transcripts take far
+# fewer read() calls than with the default block-sized buffer
+READ_BUFFER_SIZE = 1 << 20
+
+# Block size for reading a transcript backwards from its end
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Length of the Task prompt prefix used to cheaply reject non-matching roots
+PROMPT_PREFIX_LEN = 256
+
+# Fewest matched roots for which reconstruct_all_subagent_chains(workers=...)
+# bothers with a thread pool
+PARALLEL_MIN_ROOTS = 8
+
+logger = logging.getLogger(__name__)
+
+
+class Chain:
+    """
+    A reconstructed subagent conversation and the Task that started it.
+    
+    Fields are read as attributes. For callers written against the old dict
+    records, the read-only dict API also works: chain['field'], get(), in,
+    keys(), items() and dict(chain). messages holds the loaded entries
+    themselves, in conversation order, not copies of them.
+    """
+    
+    __slots__ = ('subagent_type', 'description', 'task_line', 'task_timestamp',
+                 'root_line', 'root_uuid', 'chain_length', 'messages', 'task_entry')
+    
+    def __init__(self, subagent_type: str, description: str, task_line: int,
+                 task_timestamp: int, root_line: int, root_uuid: str,
+                 messages: List[Dict], task_entry: Dict):
+        self.subagent_type = subagent_type
+        self.description = description
+        self.task_line = task_line
+        self.task_timestamp = task_timestamp
+        self.root_line = root_line
+        self.root_uuid = root_uuid
+        self.chain_length = len(messages)
+        self.messages = messages
+        self.task_entry = task_entry
+    
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+    
+    def __contains__(self, key) -> bool:
+        return key in self.__slots__
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def keys(self):
+        return self.__slots__
+    
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+    
+    def __repr__(self) -> str:
+        return (f"Chain(subagent_type={self.subagent_type!r}, task_line={self.task_line}, "
+                f"root_uuid={self.root_uuid!r}, chain_length={self.chain_length})")
+    
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
 
 class SidechainReconstructor:
+    """
+    Rebuilds subagent conversation chains from a transcript.
+    
+    Loaded entries are kept as decoded. They no longer carry the
+    '_line_number' and '_timestamp' keys that earlier versions added; read
+    them from the parallel line_numbers and timestamps arrays by position in
+    entries, or with line_number_of() / timestamp_of().
+    """
+    
     def __init__(self, transcript_path: str):
         self.transcript_path = transcript_path
         self.entries = []
-        self.uuid_map = {}
+        # Per-entry scalars, parallel to self.entries rather than stored in them
+        self.line_numbers: List[int] = []
+        self.timestamps = array('q')  # Milliseconds since the epoch, 0 if absent
+        self.uuid_index: Dict[str, int] = {}  # uuid -> position in self.entries
+        self.children_map: Dict[str, List[Dict]] = defaultdict(list)  # Sidechain parent uuid -> children
         self.sidechain_roots = []
         self.task_invocations = []
-        self.subagent_chains = []
+        self.subagent_chains: List[Chain] = []
+        self.uuid_to_subagent_type = {}  # Chain message uuid -> subagent type
+        self.root_uuid_to_subagent_type = {}  # Matched sidechain root uuid -> subagent type
         
     def load_transcript(self) -> bool:
         """Load and index all transcript entries."""
         try:
-            with open(self.transcript_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            for line_num, line in enumerate(lines):
-                try:
-                    entry = json.loads(line)
-                    entry['_line_number'] = line_num + 1
-                    
-                    # Convert timestamp to Unix timestamp
-                    timestamp_str = entry.get('timestamp', '')
-                    if timestamp_str:
-                        dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                        entry['_timestamp'] = int(dt.timestamp() * 1000)  # milliseconds
-                    else:
-                        entry['_timestamp'] = 0
-                    
-                    self.entries.append(entry)
-                    
-                    # Index by UUID
-                    if 'uuid' in entry:
-                        self.uuid_map[entry['uuid']] = entry
-                        
-                except json.JSONDecodeError:
-                    continue
-                    
-            print(f"Loaded {len(self.entries)} entries from transcript")
+            # Stream raw lines; both parsers take bytes, so skip the text decode
+            with open(self.transcript_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+                self._index_entries(self._parse_lines(f))
+            
+            logger.info("Loaded %d entries from transcript", len(self.entries))
             return True
             
         except Exception as e:
-            print(f"Error loading transcript: {e}")
+            logger.error("Error loading transcript: %s", e)
             return False
     
-    def identify_sidechain_roots(self):
-        """Find all sidechain messages with no parent (roots of chains)."""
-        for entry in self.entries:
-            if entry.get('isSidechain', False):
+    @classmethod
+    def from_messages(cls, messages: List[Dict], line_numbers: Optional[List[int]] = None,
+                      transcript_path: str = '') -> 'SidechainReconstructor':
+        """
+        Build a reconstructor over transcript entries that are already parsed,
+        instead of reading and decoding the file again.
+        
+        Args:
+            messages: The transcript's entries, in file order; indexed in
+                place rather than copied
+            line_numbers: The 1-based transcript line of each entry (default:
+                consecutive from 1)
+            transcript_path: Path the entries came from, for reference
+        """
+        reconstructor = cls(transcript_path)
+        if line_numbers is None:
+            line_numbers = range(1, len(messages) + 1)
+        try:
+            reconstructor._index_entries(zip(line_numbers, messages))
+            logger.info("Indexed %d parsed transcript entries", len(reconstructor.entries))
+        except Exception as e:
+            logger.error("Error indexing transcript entries: %s", e)
+        return reconstructor
+    
+    @staticmethod
+    def _parse_lines(lines: Iterable[bytes], first_line: int = 1) -> Iterator[Tuple[int, Dict]]:
+        """Yield (line_number, entry) for each line that decodes as JSON."""
+        for line_num, line in enumerate(lines, first_line):
+            try:
+                entry = _json_loads(line)
+            except json.JSONDecodeError:
+                # Also raised by orjson, whose error subclasses it
+                continue
+            yield line_num, entry
+    
+    def _index_entries(self, numbered_entries: Iterable[Tuple[int, Dict]]):
+        """Index (line_number, entry) pairs, given in file order."""
+        entries = self.entries
+        children_index: Dict[str, List[int]] = defaultdict(list)
+        sidechain_uuids: Set[str] = set()
+        for line_num, entry in numbered_entries:
+            index = len(entries)
+            
+            # Convert timestamp to Unix timestamp
+            timestamp_str = entry.get('timestamp', '')
+            if timestamp_str:
+                dt = _parse_datetime(timestamp_str)
+                timestamp = int(dt.timestamp() * 1000)  # milliseconds
+            else:
+                timestamp = 0
+            
+            entries.append(entry)
+            self.line_numbers.append(line_num)
+            self.timestamps.append(timestamp)
+            
+            # Index by UUID. Interned, so a uuid and the parentUuid
+            # that refers to it are one object and map/set probes
+            # settle on identity instead of comparing 36 chars
+            uuid = entry.get('uuid')
+            is_sidechain = entry.get('isSidechain', False)
+            if uuid is not None:
+                if type(uuid) is str:
+                    uuid = entry['uuid'] = sys.intern(uuid)
+                if is_sidechain:
+                    # Index each sidechain uuid once, so every entry
+                    # has at most one parent and the chains are trees
+                    if uuid in sidechain_uuids:
+                        logger.debug("Skipping duplicate sidechain uuid %s at line %d", uuid, line_num)
+                        continue
+                    sidechain_uuids.add(uuid)
+                self.uuid_index[uuid] = index
+            
+            # Index sidechain entries by parent, collecting the roots
+            # and main-chain Task invocations in the same pass
+            if is_sidechain:
                 parent_uuid = entry.get('parentUuid')
-                if not parent_uuid or parent_uuid == 'null':
+                if parent_uuid and parent_uuid != 'null':
+                    if type(parent_uuid) is str:
+                        parent_uuid = entry['parentUuid'] = sys.intern(parent_uuid)
+                    children_index[parent_uuid].append(index)
+                elif uuid is not None:
+                    # A root without a uuid can't have children
                     self.sidechain_roots.append(entry)
-                    print(f"Found sidechain root at line {entry['_line_number']}: {entry.get('uuid', 'no-uuid')[:8]}...")
+            else:
+                self._index_task_invocations(entry, index)
+        
+        # Children are visited in timestamp order
+        for parent_uuid, children in children_index.items():
+            children.sort(key=self.timestamps.__getitem__)
+            self.children_map[parent_uuid] = [entries[i] for i in children]
+    
+    def _index_task_invocations(self, entry: Dict, index: int):
+        """Record the Task tool invocations of the main-chain entry at index."""
+        msg = entry.get('message', {})
+        if msg.get('role') == 'assistant':
+            content = msg.get('content', [])
+            if isinstance(content, list):
+                for item in content:
+                    if isinstance(item, dict) and item.get('type') == 'tool_use' and item.get('name') == 'Task':
+                        task_info = {
+                            'entry': entry,
+                            'index': index,
+                            'line_number': self.line_numbers[index],
+                            'timestamp': self.timestamps[index],
+                            'input': item.get('input', {}),
+                            'subagent_type': item.get('input', {}).get('subagent_type', 'unknown'),
+                            'prompt': item.get('input', {}).get('prompt', ''),
+                            'description': item.get('input', {}).get('description', '')
+                        }
+                        self.task_invocations.append(task_info)
+    
+    def _get_entry(self, uuid: str) -> Optional[Dict]:
+        """Return the entry with this uuid, or None."""
+        index = self.uuid_index.get(uuid)
+        return self.entries[index] if index is not None else None
+    
+    @property
+    def uuid_map(self) -> Dict[str, Dict]:
+        """uuid -> entry, built from uuid_index on each access (prefer that)."""
+        entries = self.entries
+        return {uuid: entries[index] for uuid, index in self.uuid_index.items()}
+    
+    def line_number_of(self, entry: Dict) -> int:
+        """Return the 1-based transcript line of a loaded entry."""
+        return self.line_numbers[self.uuid_index[entry['uuid']]]
+    
+    def timestamp_of(self, entry: Dict) -> int:
+        """Return the timestamp of a loaded entry in milliseconds (0 if absent)."""
+        return self.timestamps[self.uuid_index[entry['uuid']]]
+    
+    def identify_sidechain_roots(self):
+        """Find all sidechain messages with no parent (roots of chains).
+        
+        The roots are collected by load_transcript; this reports them.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            for entry in self.sidechain_roots:
+                logger.debug("Found sidechain root at line %d: %s...",
+                             self.line_number_of(entry), entry['uuid'][:8])
         
-        print(f"Found {len(self.sidechain_roots)} sidechain roots")
+        logger.info("Found %d sidechain roots", len(self.sidechain_roots))
         return self.sidechain_roots
     
     def identify_task_invocations(self):
-        """Find all Task tool invocations in the main chain."""
-        for entry in self.entries:
-            if not entry.get('isSidechain', False):
-                msg = entry.get('message', {})
-                if msg.get('role') == 'assistant':
-                    content = msg.get('content', [])
-                    if isinstance(content, list):
-                        for item in content:
-                            if isinstance(item, dict) and item.get('type') == 'tool_use' and item.get('name') == 'Task':
-                                task_info = {
-                                    'entry': entry,
-                                    'line_number': entry['_line_number'],
-                                    'timestamp': entry['_timestamp'],
-                                    'input': item.get('input', {}),
-                                    'subagent_type': item.get('input', {}).get('subagent_type', 'unknown'),
-                                    'prompt': item.get('input', {}).get('prompt', ''),
-                                    'description': item.get('input', {}).get('description', '')
-                                }
-                                self.task_invocations.append(task_info)
-                                print(f"Found Task invocation at line {entry['_line_number']}: {task_info['subagent_type']}")
-        
-        print(f"Found {len(self.task_invocations)} Task invocations")
+        """Find all Task tool invocations in the main chain.
+        
+        The invocations are collected by load_transcript; this reports them.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            for task_info in self.task_invocations:
+                logger.debug("Found Task invocation at line %d: %s",
+                             task_info['line_number'], task_info['subagent_type'])
+        
+        logger.info("Found %d Task invocations", len(self.task_invocations))
         return self.task_invocations
     
     def trace_chain_backward(self, start_entry: Dict) -> List[Dict]:
@@ -104,81 +303,148 @@ class SidechainReconstructor:
                 
             if parent_uuid in visited:
                 # Circular reference protection
-                print(f"Warning: Circular reference detected at {parent_uuid}")
+                logger.warning("Circular reference detected at %s", parent_uuid)
                 break
                 
-            if parent_uuid not in self.uuid_map:
+            parent = self._get_entry(parent_uuid)
+            if parent is None:
                 # Parent not found - broken chain
-                print(f"Warning: Parent {parent_uuid} not found for {current['uuid']}")
+                logger.warning("Parent %s not found for %s", parent_uuid, current['uuid'])
                 break
                 
-            parent = self.uuid_map[parent_uuid]
-            chain.insert(0, parent)  # Add to beginning to maintain order
+            chain.append(parent)
             visited.add(parent_uuid)
             current = parent
-            
+        
+        # Built leaf-first; return root-first
+        chain.reverse()
         return chain
     
     def find_chain_from_root(self, root_entry: Dict) -> List[Dict]:
         """Build forward chain starting from a root entry."""
         chain = [root_entry]
-        children_map = defaultdict(list)
-        
-        # Build parent->children map
-        for entry in self.entries:
-            if entry.get('isSidechain', False):
-                parent_uuid = entry.get('parentUuid')
-                if parent_uuid and parent_uuid != 'null':
-                    children_map[parent_uuid].append(entry)
+        children_map = self.children_map
         
-        # Trace forward from root
-        to_process = [root_entry]
-        visited = {root_entry['uuid']}
+        # Trace forward from root. load_transcript indexes each sidechain
+        # uuid once, so no entry is reachable twice and nothing cycles
+        to_process = deque([root_entry])
         
         while to_process:
-            current = to_process.pop(0)
-            current_uuid = current.get('uuid')
-            
-            if current_uuid in children_map:
-                children = sorted(children_map[current_uuid], key=lambda x: x['_timestamp'])
-                for child in children:
-                    if child['uuid'] not in visited:
-                        chain.append(child)
-                        to_process.append(child)
-                        visited.add(child['uuid'])
+            current = to_process.popleft()
+            children = children_map.get(current.get('uuid'))
+            if children:
+                chain.extend(children)
+                to_process.extend(children)
         
         return chain
     
-    def match_prompt_to_task(self, sidechain_root: Dict, task_invocations: List[Dict]) -> Optional[Dict]:
-        """Match a sidechain root to its initiating Task invocation by prompt."""
-        # Get the prompt from the sidechain root message
+    def _build_task_index(self, task_invocations: List[Dict]) -> Tuple[List[int], List[Dict], List[str]]:
+        """Index Task invocations by timestamp for match_prompt_to_task.
+        
+        Returns (timestamps, tasks, prompt prefixes), sorted by timestamp. The
+        sort is stable, so tasks with equal timestamps stay in file order.
+        """
+        tasks = sorted(task_invocations, key=lambda task: task['timestamp'])
+        timestamps = [task['timestamp'] for task in tasks]
+        prefixes = [task['prompt'][:PROMPT_PREFIX_LEN] if task['prompt'] else '' for task in tasks]
+        return timestamps, tasks, prefixes
+    
+    def match_prompt_to_task(self, sidechain_root: Dict, task_invocations: List[Dict],
+                             task_index: Optional[Tuple[List[int], List[Dict], List[str]]] = None) -> Optional[Dict]:
+        """Match a sidechain root to its initiating Task invocation by prompt.
+        
+        task_index, from _build_task_index(task_invocations), can be passed in
+        when matching many roots against the same tasks.
+        """
+        root_content = self._root_prompt(sidechain_root)
+        
+        # Look for Task invocations that came before this sidechain
+        root_timestamp = self.timestamp_of(sidechain_root)
+        
+        if task_index is None:
+            task_index = self._build_task_index(task_invocations)
+        timestamps, tasks, prefixes = task_index
+        
+        # Find the most recent Task invocation before this sidechain that matches,
+        # walking back from the newest; among equal timestamps the earliest wins
+        best_match = None
+        for i in range(bisect_left(timestamps, root_timestamp) - 1, -1, -1):
+            task = tasks[i]
+            if best_match and task['timestamp'] != best_match['timestamp']:
+                break
+            task_prompt = task['prompt']
+            
+            # Check for exact prompt match or significant overlap; the prompt
+            # can only be contained in root_content if its prefix is
+            if task_prompt and ((prefixes[i] in root_content and task_prompt in root_content)
+                                or root_content in task_prompt):
+                best_match = task
+        
+        return best_match
+    
+    @staticmethod
+    def _root_prompt(sidechain_root: Dict) -> str:
+        """Get the prompt from the sidechain root message, as a string."""
         root_msg = sidechain_root.get('message', {})
         root_content = root_msg.get('content', '')
         
         # Convert to string if it's a list
         if isinstance(root_content, list):
-            root_content = ' '.join(str(item) for item in root_content)
-        else:
-            root_content = str(root_content)
+            return ' '.join(str(item) for item in root_content)
+        return str(root_content)
+    
+    def match_roots_to_tasks(self) -> Dict[str, str]:
+        """
+        Match each sidechain root to its Task invocation without building chains.
         
-        # Look for Task invocations that came before this sidechain
-        root_timestamp = sidechain_root['_timestamp']
+        Returns root_uuid_to_subagent_type, for use by subagent_type_for_uuid.
+        """
+        if not self.entries:
+            self.load_transcript()
         
-        # Find the most recent Task invocation before this sidechain that matches
-        best_match = None
-        for task in task_invocations:
-            if task['timestamp'] < root_timestamp:
-                task_prompt = task['prompt']
-                
-                # Check for exact prompt match or significant overlap
-                if task_prompt and (task_prompt in root_content or root_content in task_prompt):
-                    if not best_match or task['timestamp'] > best_match['timestamp']:
-                        best_match = task
+        self.identify_sidechain_roots()
+        self.identify_task_invocations()
         
-        return best_match
+        task_index = self._build_task_index(self.task_invocations)
+        for root in self.sidechain_roots:
+            task = self.match_prompt_to_task(root, self.task_invocations, task_index)
+            if task:
+                self.root_uuid_to_subagent_type.setdefault(root['uuid'], task['subagent_type'])
+        
+        return self.root_uuid_to_subagent_type
+    
+    def subagent_type_for_uuid(self, uuid: str) -> Optional[str]:
+        """
+        Find the subagent type of the chain containing a sidechain message.
+        
+        Walks parentUuid links up to the root instead of reconstructing every
+        chain. Requires match_roots_to_tasks() or reconstruct_all_subagent_chains().
+        """
+        current = self._get_entry(uuid)
+        visited = set()
+        while current is not None and current.get('isSidechain', False):
+            current_uuid = current['uuid']
+            if current_uuid in visited:
+                # Circular reference protection
+                return None
+            visited.add(current_uuid)
+            
+            parent_uuid = current.get('parentUuid')
+            if not parent_uuid or parent_uuid == 'null':
+                # Reached the root
+                return self.root_uuid_to_subagent_type.get(current_uuid)
+            current = self._get_entry(parent_uuid)
+        
+        return None
     
-    def reconstruct_all_subagent_chains(self) -> List[Dict]:
-        """Reconstruct all subagent conversation chains."""
+    def reconstruct_all_subagent_chains(self, workers: Optional[int] = None) -> List[Chain]:
+        """Reconstruct all subagent conversation chains.
+        
+        Args:
+            workers: If greater than 1, build the chains of at least
+                PARALLEL_MIN_ROOTS matched roots on a thread pool of this size.
+                The traversals only read the indexes built during loading.
+        """
         # Load and index everything
         if not self.entries:
             self.load_transcript()
@@ -188,74 +454,215 @@ class SidechainReconstructor:
         self.identify_task_invocations()
         
         # Match each sidechain root to its Task invocation
+        task_index = self._build_task_index(self.task_invocations)
+        matches = []
         for root in self.sidechain_roots:
-            task = self.match_prompt_to_task(root, self.task_invocations)
-            
+            task = self.match_prompt_to_task(root, self.task_invocations, task_index)
             if task:
-                # Build the complete chain
-                chain = self.find_chain_from_root(root)
-                
-                subagent_info = {
-                    'subagent_type': task['subagent_type'],
-                    'description': task['description'],
-                    'task_line': task['line_number'],
-                    'task_timestamp': task['timestamp'],
-                    'root_line': root['_line_number'],
-                    'root_uuid': root['uuid'],
-                    'chain_length': len(chain),
-                    'messages': chain,
-                    'task_entry': task['entry']
-                }
-                
-                self.subagent_chains.append(subagent_info)
-                print(f"Matched chain: {task['subagent_type']} - {len(chain)} messages")
+                matches.append((root, task))
             else:
-                print(f"Warning: Could not match sidechain root at line {root['_line_number']} to any Task")
+                logger.warning("Could not match sidechain root at line %d to any Task", self.line_number_of(root))
+        
+        # Build the complete chains; the forward traversals are independent
+        roots = [root for root, _ in matches]
+        if workers and workers > 1 and len(roots) >= PARALLEL_MIN_ROOTS:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chains = list(pool.map(self.find_chain_from_root, roots))
+        else:
+            chains = [self.find_chain_from_root(root) for root in roots]
+        
+        for (root, task), chain in zip(matches, chains):
+            subagent_info = Chain(
+                subagent_type=task['subagent_type'],
+                description=task['description'],
+                task_line=task['line_number'],
+                task_timestamp=task['timestamp'],
+                root_line=self.line_number_of(root),
+                root_uuid=root['uuid'],
+                messages=chain,
+                task_entry=task['entry']
+            )
+            
+            self.subagent_chains.append(subagent_info)
+            self.root_uuid_to_subagent_type.setdefault(root['uuid'], task['subagent_type'])
+            for msg in chain:
+                # Keep the first chain a message was found in
+                self.uuid_to_subagent_type.setdefault(msg['uuid'], task['subagent_type'])
+            logger.debug("Matched chain: %s - %d messages", task['subagent_type'], len(chain))
         
         return self.subagent_chains
     
+    def reconstruct_latest_chain(self, subagent_type: str) -> Optional[Chain]:
+        """
+        Reconstruct only the most recent chain of a subagent type.
+        
+        Reads the transcript backwards in TAIL_BLOCK_SIZE blocks, back to the
+        newest Task that one of the sidechain roots read so far belongs to,
+        and no further than the Task of every such root. Only that tail is
+        loaded, so the reconstructor then holds the chains that start in it.
+        In the worst case, e.g. a root without a Task, this reads the whole
+        file and matches reconstruct_all_subagent_chains().
+        
+        Returns:
+            The chain, or None if there is none of this type
+        """
+        if not self.entries:
+            try:
+                first_line, lines = self._read_latest_region(subagent_type)
+                self._index_entries(self._parse_lines(lines, first_line))
+            except Exception as e:
+                logger.error("Error loading transcript: %s", e)
+                return None
+            logger.info("Loaded %d entries from the transcript tail, starting at line %d",
+                        len(self.entries), first_line)
+            if not self.entries:
+                return None
+        
+        latest = None
+        for chain in self.reconstruct_all_subagent_chains():
+            if chain.subagent_type == subagent_type:
+                latest = chain
+        return latest
+    
+    def _read_latest_region(self, subagent_type: str) -> Tuple[int, List[bytes]]:
+        """
+        Find the tail of the transcript that reconstruct_latest_chain needs.
+        
+        Returns (first line number, the tail's lines in file order).
+        """
+        pending: List[Tuple[str, int]] = []  # (prompt, timestamp) of roots without a Task yet
+        found = False  # Some root has been matched to a Task of subagent_type
+        region: List[bytes] = []  # Newest first
+        region_start = 0
+        
+        with open(self.transcript_path, 'rb') as f:
+            end = f.seek(0, 2)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) == b'\n':
+                    # No line after the final newline
+                    end -= 1
+            
+            pos = end
+            carry = b''
+            while pos > 0 and not (found and not pending):
+                size = min(TAIL_BLOCK_SIZE, pos)
+                pos -= size
+                f.seek(pos)
+                lines = (f.read(size) + carry).split(b'\n')
+                # The first piece may continue in the previous block
+                first = 1 if pos > 0 else 0
+                carry = lines[0]
+                
+                for i in range(len(lines) - 1, first - 1, -1):
+                    line = lines[i]
+                    region.append(line)
+                    try:
+                        entry = _json_loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    
+                    if entry.get('isSidechain', False):
+                        parent_uuid = entry.get('parentUuid')
+                        if (not parent_uuid or parent_uuid == 'null') and entry.get('uuid') is not None:
+                            pending.append((self._root_prompt(entry), self._entry_timestamp(entry)))
+                        continue
+                    
+                    for task_type, task_prompt in self._task_prompts(entry):
+                        if not task_prompt:
+                            continue
+                        task_timestamp = self._entry_timestamp(entry)
+                        # Same test as match_prompt_to_task; a Task is the
+                        # match of every earlier-seen root it fits
+                        still_pending = [
+                            (root_prompt, root_timestamp) for root_prompt, root_timestamp in pending
+                            if not (task_timestamp < root_timestamp and
+                                    (task_prompt in root_prompt or root_prompt in task_prompt))
+                        ]
+                        if len(still_pending) < len(pending):
+                            found = found or task_type == subagent_type
+                            pending = still_pending
+                    
+                    if found and not pending:
+                        region_start = pos + sum(len(piece) + 1 for piece in lines[:i])
+                        break
+            
+            # Number the region's lines from the newlines before it
+            first_line = 1
+            if region_start:
+                f.seek(0)
+                remaining = region_start
+                while remaining:
+                    block = f.read(min(READ_BUFFER_SIZE, remaining))
+                    if not block:
+                        break
+                    first_line += block.count(b'\n')
+                    remaining -= len(block)
+        
+        region.reverse()
+        return first_line, region
+    
+    @staticmethod
+    def _entry_timestamp(entry: Dict) -> int:
+        """Timestamp of an entry in milliseconds, as load_transcript records it."""
+        timestamp_str = entry.get('timestamp', '')
+        return int(_parse_datetime(timestamp_str).timestamp() * 1000) if timestamp_str else 0
+    
+    @staticmethod
+    def _task_prompts(entry: Dict) -> List[Tuple[str, str]]:
+        """(subagent_type, prompt) of each Task invocation in a main-chain entry."""
+        msg = entry.get('message', {})
+        if msg.get('role') != 'assistant':
+            return []
+        content = msg.get('content', [])
+        if not isinstance(content, list):
+            return []
+        return [(item.get('input', {}).get('subagent_type', 'unknown'), item.get('input', {}).get('prompt', ''))
+                for item in content
+                if isinstance(item, dict) and item.get('type') == 'tool_use' and item.get('name') == 'Task']
+    
     def get_subagent_conversation(self, subagent_type: str) -> Optional[List[Dict]]:
         """Get the conversation chain for a specific subagent type."""
         for chain_info in self.subagent_chains:
-            if chain_info['subagent_type'] == subagent_type:
-                return chain_info['messages']
+            if chain_info.subagent_type == subagent_type:
+                return chain_info.messages
         return None
     
     def analyze_subagent_chains(self) -> Dict:
         """Analyze all reconstructed chains for statistics."""
-        stats = {
-            'total_chains': len(self.subagent_chains),
-            'subagent_types': {},
-            'chain_lengths': [],
-            'total_sidechain_messages': 0
-        }
+        subagent_types: Dict[str, Dict] = {}
+        chain_lengths = [chain_info.chain_length for chain_info in self.subagent_chains]
         
-        for chain_info in self.subagent_chains:
-            subagent_type = chain_info['subagent_type']
-            chain_length = chain_info['chain_length']
-            
-            if subagent_type not in stats['subagent_types']:
-                stats['subagent_types'][subagent_type] = {
+        for chain_info, chain_length in zip(self.subagent_chains, chain_lengths):
+            subagent_type = chain_info.subagent_type
+            type_stats = subagent_types.get(subagent_type)
+            if type_stats is None:
+                type_stats = subagent_types[subagent_type] = {
                     'count': 0,
                     'total_messages': 0,
                     'chains': []
                 }
             
-            stats['subagent_types'][subagent_type]['count'] += 1
-            stats['subagent_types'][subagent_type]['total_messages'] += chain_length
-            stats['subagent_types'][subagent_type]['chains'].append({
-                'task_line': chain_info['task_line'],
+            type_stats['count'] += 1
+            type_stats['total_messages'] += chain_length
+            type_stats['chains'].append({
+                'task_line': chain_info.task_line,
                 'length': chain_length,
-                'description': chain_info['description']
+                'description': chain_info.description
             })
-            
-            stats['chain_lengths'].append(chain_length)
-            stats['total_sidechain_messages'] += chain_length
         
-        if stats['chain_lengths']:
-            stats['avg_chain_length'] = sum(stats['chain_lengths']) / len(stats['chain_lengths'])
-            stats['max_chain_length'] = max(stats['chain_lengths'])
-            stats['min_chain_length'] = min(stats['chain_lengths'])
+        total_messages = sum(chain_lengths)
+        stats = {
+            'total_chains': len(self.subagent_chains),
+            'subagent_types': subagent_types,
+            'chain_lengths': chain_lengths,
+            'total_sidechain_messages': total_messages
+        }
+        
+        if chain_lengths:
+            stats['avg_chain_length'] = total_messages / len(chain_lengths)
+            stats['max_chain_length'] = max(chain_lengths)
+            stats['min_chain_length'] = min(chain_lengths)
         
         return stats
 
@@ -305,16 +712,16 @@ def test_reconstruction():
     if chains:
         first_chain = chains[0]
         print(f"\n6. Sample Chain Details:")
-        print(f"   Subagent: {first_chain['subagent_type']}")
-        print(f"   Task at line: {first_chain['task_line']}")
-        print(f"   Chain starts at line: {first_chain['root_line']}")
-        print(f"   Messages in chain: {first_chain['chain_length']}")
+        print(f"   Subagent: {first_chain.subagent_type}")
+        print(f"   Task at line: {first_chain.task_line}")
+        print(f"   Chain starts at line: {first_chain.root_line}")
+        print(f"   Messages in chain: {first_chain.chain_length}")
         
         # Show first few messages
         print(f"\n   First 3 messages in chain:")
-        for i, msg in enumerate(first_chain['messages'][:3], 1):
+        for i, msg in enumerate(first_chain.messages[:3], 1):
             role = msg.get('message', {}).get('role', 'unknown')
-            line = msg.get('_line_number', '?')
+            line = reconstructor.line_number_of(msg)
             print(f"   {i}. Line {line}: Role={role}")
             
             # Show content preview
@@ -327,4 +734,5 @@ def test_reconstruction():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     test_reconstruction()
\ No newline at end of file
@@ -6,10 +6,34 @@ Provides easy access to the current calling subagent for other hooks.
 
 import os
 import json
-import time
-from typing import Optional, Dict, Any, Tuple
+import functools
+from collections import defaultdict
+from typing import Optional, Dict, Any, Iterator, Tuple
 from pathlib import Path
 
+# Optional C-accelerated JSON parser
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+@functools.lru_cache(maxsize=1)
+def _discover_data_dir() -> str:
+    """Locate the monitor's data directory; it doesn't move within a process."""
+    # Try global installation first
+    global_dir = Path.home() / '.claude' / 'subagent-monitor' / 'data'
+    if global_dir.exists():
+        return str(global_dir)
+    
+    # Fall back to project installation
+    project_dir = Path('.claude') / 'subagent-monitor' / 'data'
+    if project_dir.exists():
+        return str(project_dir)
+    
+    # Use environment variable if set
+    return os.environ.get('SUBAGENT_DATA_DIR', str(global_dir))
+
+
 class SubagentContext:
     """
     Simple API for other hooks to determine the calling subagent.
@@ -27,22 +51,17 @@ class SubagentContext:
     def __init__(self, data_dir: str = None):
         """Initialize with optional data directory override."""
         if data_dir is None:
-            # Try global installation first
-            global_dir = Path.home() / '.claude' / 'subagent-monitor' / 'data'
-            if global_dir.exists():
-                self.data_dir = str(global_dir)
-            else:
-                # Fall back to project installation
-                project_dir = Path('.claude') / 'subagent-monitor' / 'data'
-                if project_dir.exists():
-                    self.data_dir = str(project_dir)
-                else:
-                    # Use environment variable if set
-                    self.data_dir = os.environ.get('SUBAGENT_DATA_DIR', str(global_dir))
+            self.data_dir = _discover_data_dir()
         else:
             self.data_dir = data_dir
         
-        self.state_file = os.path.join(self.data_dir, 'active_subagents.json')
+        self.state_file = Path(self.data_dir) / 'active_subagents.json'
+        
+        # Active subagents parsed from the state file, grouped by session, and
+        # the file contents they were parsed from
+        self._cache: list = []
+        self._by_session: Dict[str, list] = {}
+        self._cache_key: Optional[bytes] = None
     
     def get_current_subagent(self, session_id: str = None) -> Optional[Dict[str, Any]]:
         """
@@ -61,22 +80,12 @@ class SubagentContext:
                 'tracking_id': 'uuid'
             }
         """
-        # Try to get session_id from environment if not provided
-        if session_id is None:
-            session_id = os.environ.get('CLAUDE_SESSION_ID', 
-                                       os.environ.get('SESSION_ID'))
-        
+        session_id = self._resolve_session_id(session_id)
         if not session_id:
             return None
         
-        # Read active subagents
-        active_subagents = self._get_active_subagents()
-        
-        # Find subagents for this session
-        session_subagents = [
-            sub for sub in active_subagents 
-            if sub.get('session_id') == session_id
-        ]
+        # Find active subagents for this session
+        session_subagents = self._active_for_session(session_id)
         
         if not session_subagents:
             return None
@@ -92,8 +101,14 @@ class SubagentContext:
                 'tracking_id': sub.get('tracking_id')
             }
         
-        # Multiple active - return the most recent with lower confidence
-        most_recent = max(session_subagents, key=lambda x: x.get('start_time', 0))
+        # Multiple active - return the most recent with lower confidence;
+        # on ties the first one wins, as with max()
+        most_recent = session_subagents[0]
+        latest = most_recent.get('start_time', 0)
+        for sub in session_subagents:
+            start_time = sub.get('start_time', 0)
+            if start_time > latest:
+                most_recent, latest = sub, start_time
         return {
             'type': most_recent['subagent_type'],
             'confidence': 0.7,  # Lower confidence due to multiple active
@@ -110,15 +125,8 @@ class SubagentContext:
         Returns:
             List of active subagent dictionaries.
         """
-        active_subagents = self._get_active_subagents()
-        
-        if session_id:
-            return [
-                sub for sub in active_subagents 
-                if sub.get('session_id') == session_id
-            ]
-        
-        return active_subagents
+        # A fresh list, so callers can't reorder the cached ones
+        return list(self._iter_active_subagents(session_id))
     
     def is_subagent_context(self, session_id: str = None) -> bool:
         """
@@ -127,7 +135,8 @@ class SubagentContext:
         Returns:
             True if there's at least one active subagent, False otherwise.
         """
-        return self.get_current_subagent(session_id) is not None
+        session_id = self._resolve_session_id(session_id)
+        return bool(session_id) and bool(self._active_for_session(session_id))
     
     def get_subagent_chain(self, session_id: str = None) -> list:
         """
@@ -136,32 +145,68 @@ class SubagentContext:
         Returns:
             List of subagent types from oldest to newest.
         """
-        subagents = self.get_all_active_subagents(session_id)
-        
         # Sort by start time
-        subagents.sort(key=lambda x: x.get('start_time', 0))
+        subagents = sorted(self._iter_active_subagents(session_id),
+                           key=lambda x: x.get('start_time', 0))
         
         return [sub['subagent_type'] for sub in subagents]
     
+    @staticmethod
+    def _resolve_session_id(session_id: Optional[str]) -> Optional[str]:
+        """Fall back to the session ID from the environment if none is given."""
+        if session_id is None:
+            session_id = os.environ.get('CLAUDE_SESSION_ID', 
+                                       os.environ.get('SESSION_ID'))
+        return session_id
+    
     def _get_active_subagents(self) -> list:
-        """Read active subagents from state file."""
-        if not os.path.exists(self.state_file):
-            return []
+        """
+        Read active subagents from state file.
         
+        The file is read on every call, but only parsed again when its
+        contents changed. mtime and size can't tell a same-size rewrite within
+        one mtime tick apart, so they aren't used as the key.
+        """
         try:
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
+            with self.state_file.open('rb') as f:
+                key = f.read()
+        except OSError:
+            self._cache, self._by_session, self._cache_key = [], {}, None
+            return self._cache
+        
+        if key == self._cache_key:
+            return self._cache
+        
+        try:
+            state = _json_loads(key)
             
             # Filter for active status
             active = []
+            by_session = defaultdict(list)
             for tracking_id, sub in state.items():
                 if sub.get('status') == 'active':
                     sub['tracking_id'] = tracking_id
                     active.append(sub)
-            
-            return active
+                    by_session[sub.get('session_id')].append(sub)
         except Exception:
-            return []
+            # Unreadable or mid-write; try again next call
+            self._cache, self._by_session, self._cache_key = [], {}, None
+            return self._cache
+        
+        self._cache, self._by_session, self._cache_key = active, dict(by_session), key
+        return active
+    
+    def _active_for_session(self, session_id: str) -> list:
+        """Return the cached active subagents of one session; don't modify it."""
+        self._get_active_subagents()
+        return self._by_session.get(session_id, [])
+    
+    def _iter_active_subagents(self, session_id: str = None) -> Iterator[Dict[str, Any]]:
+        """Yield the active subagents, only those of session_id if given."""
+        if session_id:
+            yield from self._active_for_session(session_id)
+        else:
+            yield from self._get_active_subagents()
     
     @staticmethod
     def require_subagent(subagent_types: list = None):
@@ -179,8 +224,7 @@ class SubagentContext:
         """
         def decorator(func):
             def wrapper(*args, **kwargs):
-                context = SubagentContext()
-                current = context.get_current_subagent()
+                current = _get_shared_context().get_current_subagent()
                 
                 if not current:
                     print(f"[{func.__name__}] Skipping - not in subagent context")
@@ -198,6 +242,22 @@ class SubagentContext:
         return decorator
 
 
+_shared_context: Optional[SubagentContext] = None
+
+
+def _get_shared_context() -> SubagentContext:
+    """
+    Return a module-wide SubagentContext, so its state file cache is reused.
+    
+    It uses the default data directory; instantiate SubagentContext directly
+    to use another one.
+    """
+    global _shared_context
+    if _shared_context is None:
+        _shared_context = SubagentContext()
+    return _shared_context
+
+
 # Convenience functions for simple use cases
 def get_calling_subagent(session_id: str = None) -> Optional[str]:
     """
@@ -206,8 +266,7 @@ def get_calling_subagent(session_id: str = None) -> Optional[str]:
     Returns:
         Subagent type string or None if not in subagent context.
     """
-    context = SubagentContext()
-    subagent = context.get_current_subagent(session_id)
+    subagent = _get_shared_context().get_current_subagent(session_id)
     return subagent['type'] if subagent else None
 
 
@@ -218,8 +277,7 @@ def in_subagent_context(session_id: str = None) -> bool:
     Returns:
         True if in subagent context, False otherwise.
     """
-    context = SubagentContext()
-    return context.is_subagent_context(session_id)
+    return _get_shared_context().is_subagent_context(session_id)
 
 
 def get_current_agent(session_id: str = None) -> Tuple[str, float]:
@@ -231,8 +289,7 @@ def get_current_agent(session_id: str = None) -> Tuple[str, float]:
         - agent_type: 'main' for main agent, or subagent type
         - confidence: 1.0 for main or single subagent, lower for multiple subagents
     """
-    context = SubagentContext()
-    subagent = context.get_current_subagent(session_id)
+    subagent = _get_shared_context().get_current_subagent(session_id)
     
     if subagent:
         return (subagent['type'], subagent.get('confidence', 1.0))
@@ -4,57 +4,92 @@ Enhanced SubagentStop hook for Claude Code subagent tracking.
 Uses robust detection to identify which subagent stopped.
 """
 
-import sys
 import os
 from typing import Dict, Any
 
-from database_utils import SubagentTracker, read_hook_input, write_hook_response, log_debug
-from robust_subagent_detector import RobustSubagentDetector
-from transcript_parser import TranscriptParser, parse_latest_subagent_conversation
-from enhanced_stats_analyzer import EnhancedStatsAnalyzer
+from database_utils import SubagentTracker, read_hook_input, write_hook_response, log_debug_batch
+
+# (minimum confidence, success status, response emoji), highest first
+_THRESHOLDS = (
+    (0.8, 'completed', "✅"),
+    (0.5, 'likely_completed', "⚠️"),
+    (float('-inf'), 'uncertain', "❓"),
+)
+
+# Shared active subagent tracker, reused across hook calls in a long-lived process
+_active_tracker = None
+
+def get_active_tracker():
+    """Get or create the shared active subagent tracker."""
+    global _active_tracker
+    if _active_tracker is None:
+        from active_subagent_tracker import ActiveSubagentTracker
+        _active_tracker = ActiveSubagentTracker()
+    return _active_tracker
+
+def _transcript_has_content(transcript_path: str) -> bool:
+    """Check that the transcript exists and is non-empty, with a single stat."""
+    try:
+        return os.stat(transcript_path).st_size > 0
+    except OSError:
+        return False
+
+# Debug entries of this hook run, written together when main() finishes
+_log_buffer = []
+
+def dlog(message: str, data: Dict[str, Any] = None):
+    """Queue a debug entry for log_debug_batch."""
+    _log_buffer.append((message, data))
 
 def main():
     """Main hook execution function."""
+    try:
+        _main()
+    finally:
+        # Also runs on the SystemExit raised by write_hook_response
+        log_debug_batch(_log_buffer)
+        _log_buffer.clear()
+
+def _main():
     try:
         # Read hook input from Claude Code
         hook_data = read_hook_input()
         
         if not hook_data:
-            log_debug("No hook data received")
+            dlog("No hook data received")
             write_hook_response(exit_code=0)
             return
         
         session_id = hook_data.get('session_id')
         transcript_path = hook_data.get('transcript_path')
         
-        log_debug(f"SubagentStop hook triggered", {
+        dlog(f"SubagentStop hook triggered", {
             'session_id': session_id,
             'transcript_path': transcript_path
         })
         
-        # Use robust detector to identify which subagent stopped
-        detector = RobustSubagentDetector()
+        # Use robust detector to identify which subagent stopped; imported
+        # here so runs without hook data don't load it
+        from robust_subagent_detector import RobustSubagentDetector
+        detector = RobustSubagentDetector(get_active_tracker())
         subagent_type, confidence, detection_details = detector.detect_stopped_subagent(hook_data)
         
         if not subagent_type:
-            log_debug("Could not determine which subagent stopped", detection_details)
+            dlog("Could not determine which subagent stopped", detection_details)
             write_hook_response(exit_code=0)
             return
         
-        log_debug(f"Detected stopped subagent", {
+        dlog(f"Detected stopped subagent", {
             'subagent_type': subagent_type,
             'confidence': confidence,
             'method': detection_details.get('detection_method', []),
             'tracking_id': detection_details.get('selected_tracking_id')
         })
         
-        # Determine success status based on confidence and detection
-        if confidence >= 0.8:
-            success_status = 'completed'
-        elif confidence >= 0.5:
-            success_status = 'likely_completed'
-        else:
-            success_status = 'uncertain'
+        # Determine success status (and the response emoji) from confidence
+        for threshold, success_status, status_emoji in _THRESHOLDS:
+            if confidence >= threshold:
+                break
         
         # Initialize database tracker
         db_tracker = SubagentTracker()
@@ -67,13 +102,13 @@ def main():
         )
         
         if not subagent_session_id:
-            log_debug(f"No active database record found for subagent", {
+            dlog(f"No active database record found for subagent", {
                 'session_id': session_id,
                 'subagent_type': subagent_type
             })
             # Continue anyway - we still have useful data
         else:
-            log_debug(f"Marked subagent as stopped in database", {
+            dlog(f"Marked subagent as stopped in database", {
                 'subagent_session_id': subagent_session_id,
                 'subagent_type': subagent_type,
                 'success_status': success_status
@@ -82,23 +117,26 @@ def main():
         # Parse transcript for detailed statistics if available
         stats_updated = False
         enhanced_stats = None
-        if transcript_path and os.path.exists(transcript_path) and subagent_session_id:
+        if subagent_session_id and transcript_path and _transcript_has_content(transcript_path):
             try:
-                # Use enhanced parser to get latest conversation stats
-                tool_usage, message_stats, token_estimate = parse_latest_subagent_conversation(
-                    transcript_path, subagent_type
-                )
+                # Only needed when there is a transcript to analyze
+                from transcript_parser import TranscriptParser
                 
-                # Get the actual conversation for enhanced analysis
-                parser = TranscriptParserV2(transcript_path)
-                conversation = parser.get_latest_subagent_conversation(subagent_type)
+                # Reconstruct the transcript once for both the basic stats and
+                # the enhanced analysis of the latest conversation
+                tool_usage, message_stats, token_estimate, conversation = \
+                    TranscriptParser(transcript_path).analyze(subagent_type)
+                tool_types = len(tool_usage)
+                tool_calls_total = sum(tool_usage.values())
                 
-                # Analyze with enhanced stats analyzer
+                # Analyze with enhanced stats analyzer; without a conversation
+                # there is nothing for it (or the basic stats) to report
                 if conversation:
+                    from enhanced_stats_analyzer import EnhancedStatsAnalyzer
                     analyzer = EnhancedStatsAnalyzer()
                     enhanced_stats = analyzer.analyze_conversation(conversation)
                     
-                    log_debug(f"Enhanced statistics collected", {
+                    dlog(f"Enhanced statistics collected", {
                         'runtime': enhanced_stats.get('total_runtime'),
                         'turns': enhanced_stats.get('total_turns'),
                         'files_created': enhanced_stats.get('files_created'),
@@ -118,17 +156,17 @@ def main():
                     
                     stats_updated = True
                     
-                    log_debug(f"Updated subagent statistics from transcript", {
+                    dlog(f"Updated subagent statistics from transcript", {
                         'subagent_session_id': subagent_session_id,
-                        'tools_used': len(tool_usage) if tool_usage else 0,
-                        'total_tool_calls': sum(tool_usage.values()) if tool_usage else 0,
+                        'tools_used': tool_types,
+                        'total_tool_calls': tool_calls_total,
                         'message_types': len(message_stats) if message_stats else 0,
                         'estimated_tokens': token_estimate,
                         'enhanced_metrics': bool(enhanced_stats)
                     })
                 
             except Exception as e:
-                log_debug(f"Error parsing transcript for statistics: {e}")
+                dlog(f"Error parsing transcript for statistics: {e}")
                 if subagent_session_id:
                     db_tracker.log_error(
                         subagent_session_id=subagent_session_id,
@@ -139,17 +177,14 @@ def main():
         # Mark as completed in active tracker
         if detection_details.get('selected_tracking_id'):
             try:
-                from active_subagent_tracker import ActiveSubagentTracker
-                active_tracker = ActiveSubagentTracker()
-                active_tracker.mark_completed(detection_details['selected_tracking_id'])
-                log_debug(f"Marked tracking ID as completed", {
+                get_active_tracker().mark_completed(detection_details['selected_tracking_id'])
+                dlog(f"Marked tracking ID as completed", {
                     'tracking_id': detection_details['selected_tracking_id']
                 })
             except Exception as e:
-                log_debug(f"Error updating active tracker: {e}")
+                dlog(f"Error updating active tracker: {e}")
         
         # Build response message
-        status_emoji = "✅" if confidence >= 0.8 else "⚠️" if confidence >= 0.5 else "❓"
         stats_info = ""
         
         if stats_updated:
@@ -164,10 +199,8 @@ def main():
                     if enhanced_stats.get('files_modified'):
                         file_ops.append(f"{enhanced_stats['files_modified']} modified")
                     parts.append(f"files: {', '.join(file_ops)}")
-            if tool_usage:
-                tools_count = len(tool_usage)
-                total_calls = sum(tool_usage.values())
-                parts.append(f"{tools_count} tools")
+            if tool_types:
+                parts.append(f"{tool_types} tools")
             if parts:
                 stats_info = f" - {', '.join(parts)}"
         
@@ -179,7 +212,7 @@ def main():
         write_hook_response(response, exit_code=0)
         
     except Exception as e:
-        log_debug(f"SubagentStop hook error: {e}")
+        dlog(f"SubagentStop hook error: {e}")
         # Don't block on hook errors
         write_hook_response(exit_code=0)
 
@@ -4,24 +4,118 @@ Enhanced transcript parser for Claude Code subagent tracking.
 Uses UUID chain reconstruction to accurately extract subagent conversations.
 """
 
-import json
 import os
-from typing import Dict, Any, List, Tuple, Optional
-from collections import defaultdict, Counter
-from sidechain_reconstructor import SidechainReconstructor
+import functools
+from typing import Dict, Any, List, NamedTuple, Tuple, Optional
+from collections import defaultdict
+from sidechain_reconstructor import Chain, SidechainReconstructor
+
+# Shared stand-in for a missing message; never modified
+_EMPTY: Dict[str, Any] = {}
+
+
+def _content_len(obj: Any) -> int:
+    """
+    Length of obj written as JSON, without building the string.
+    
+    Matches json.dumps() with its default separators, except that string
+    escapes are not expanded: text is counted as the characters it holds.
+    """
+    t = type(obj)
+    if t is str:
+        return len(obj) + 2
+    if t is list:
+        if not obj:
+            return 2
+        # Brackets, plus ', ' between items
+        return sum(_content_len(item) for item in obj) + 2 * len(obj)
+    if t is dict:
+        if not obj:
+            return 2
+        # Braces, plus '"key": ' per item and ', ' between items
+        return sum(len(str(key)) + _content_len(value) for key, value in obj.items()) + 6 * len(obj)
+    if obj is None or obj is True:
+        return 4
+    if obj is False:
+        return 5
+    return len(repr(obj)) if t in (int, float) else len(str(obj))
+
+
+def _estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Token estimate of messages, measured exactly as TranscriptParser does."""
+    total_chars = 0
+    content_len_of = _content_len
+    for entry in messages:
+        content = (entry.get('message') or _EMPTY).get('content', '')
+        content_type = type(content)
+        if content_type is list:
+            total_chars += content_len_of(content)
+        elif content_type is str:
+            total_chars += len(content)
+        else:
+            total_chars += len(str(content))
+    return total_chars // 4
+
+
+class ParseResult(NamedTuple):
+    """
+    Statistics of one subagent conversation.
+    
+    A plain (tool_usage, message_stats, token_estimate) tuple whose fields
+    can also be read by name. Callers that only need the token estimate
+    should use parse_token_estimate_only(), which skips the rest.
+    """
+    tool_usage: Dict[str, int]
+    message_stats: Dict[str, Dict[str, int]]
+    estimated_tokens: int
+
 
 class TranscriptParser:
+    """Extracts and analyzes subagent conversations from a transcript."""
+    
     def __init__(self, transcript_path: str):
         self.transcript_path = transcript_path
         self.reconstructor = SidechainReconstructor(transcript_path)
-        self.subagent_chains = []
+        self.subagent_chains: List[Chain] = []
+        self._by_type: Dict[str, List[Chain]] = {}  # subagent_type -> its chains, in order
+        self._last_mtime: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the transcript as last loaded
+        # root_uuid -> (tool_usage, message_stats, token_estimate) of that chain
+        self._analysis_cache: Dict[str, Tuple[Dict[str, int], Dict[str, Dict[str, int]], int]] = {}
     
     def load_and_reconstruct(self) -> bool:
-        """Load transcript and reconstruct all subagent chains."""
+        """
+        Load transcript and reconstruct all subagent chains.
+        
+        Does nothing if the transcript is unchanged since the last load.
+        """
+        try:
+            st = os.stat(self.transcript_path)
+            mtime = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            mtime = None
+        
+        if mtime is not None and mtime == self._last_mtime:
+            return len(self.subagent_chains) > 0
+        
+        if self._last_mtime is not None:
+            # Changed since the last load; start over
+            self.reconstructor = SidechainReconstructor(self.transcript_path)
+            self.subagent_chains = []
+            self._by_type = {}
+            self._analysis_cache.clear()
+            self._last_mtime = None
+        
         if not self.reconstructor.load_transcript():
             return False
         
         self.subagent_chains = self.reconstructor.reconstruct_all_subagent_chains()
+        self._last_mtime = mtime
+        
+        by_type = defaultdict(list)
+        for chain in self.subagent_chains:
+            by_type[chain.subagent_type].append(chain)
+        self._by_type = dict(by_type)
+        
         return len(self.subagent_chains) > 0
     
     def get_subagent_conversation(self, subagent_type: str, occurrence: int = 0) -> Optional[List[Dict]]:
@@ -35,13 +129,10 @@ class TranscriptParser:
         Returns:
             List of messages in the conversation chain, or None if not found
         """
-        matching_chains = [
-            chain for chain in self.subagent_chains 
-            if chain['subagent_type'] == subagent_type
-        ]
+        matching_chains = self._by_type.get(subagent_type, ())
         
         if occurrence < len(matching_chains):
-            return matching_chains[occurrence]['messages']
+            return matching_chains[occurrence].messages
         
         return None
     
@@ -55,17 +146,52 @@ class TranscriptParser:
         Returns:
             List of messages in the most recent conversation chain, or None if not found
         """
-        matching_chains = [
-            chain for chain in self.subagent_chains 
-            if chain['subagent_type'] == subagent_type
-        ]
+        matching_chains = self._by_type.get(subagent_type, ())
         
         if not matching_chains:
             return None
         
         # Chains are already in order from reconstruction (based on Task line numbers)
         # Return the last one
-        return matching_chains[-1]['messages']
+        return matching_chains[-1].messages
+    
+    def analyze(self, subagent_type: str) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]], int, Optional[List[Dict]]]:
+        """
+        Get the statistics and messages of the latest conversation of a subagent type.
+        
+        Loads and reconstructs the transcript if it is new or has changed,
+        so one parser serves both the statistics and the conversation.
+        
+        Args:
+            subagent_type: The type of subagent
+        
+        Returns:
+            Tuple of (tool_usage, message_stats, token_estimate, conversation);
+            ({}, {}, 0, None) if there is no such conversation
+        """
+        self.load_and_reconstruct()
+        
+        matching_chains = self._by_type.get(subagent_type, ())
+        
+        if not matching_chains or not matching_chains[-1].messages:
+            return {}, {}, 0, None
+        
+        latest_chain = matching_chains[-1]
+        return self._analyze_chain(latest_chain) + (latest_chain.messages,)
+    
+    def _analyze_chain(self, chain: Chain) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]], int]:
+        """
+        Get (tool_usage, message_stats, token_estimate) for a reconstructed chain.
+        
+        Results are cached by root uuid, so the info, summary and analyze
+        accessors share one analysis per chain; don't modify them.
+        """
+        root_uuid = chain.root_uuid
+        result = self._analysis_cache.get(root_uuid)
+        if result is None:
+            result = self._single_pass(chain.messages)
+            self._analysis_cache[root_uuid] = result
+        return result
     
     def get_subagent_occurrence_count(self, subagent_type: str) -> int:
         """
@@ -77,10 +203,7 @@ class TranscriptParser:
         Returns:
             Number of invocations
         """
-        return len([
-            chain for chain in self.subagent_chains 
-            if chain['subagent_type'] == subagent_type
-        ])
+        return len(self._by_type.get(subagent_type, ()))
     
     def get_latest_subagent_info(self, subagent_type: str) -> Optional[Dict[str, Any]]:
         """
@@ -92,32 +215,30 @@ class TranscriptParser:
         Returns:
             Dict with chain info, statistics, and metadata, or None if not found
         """
-        matching_chains = [
-            chain for chain in self.subagent_chains 
-            if chain['subagent_type'] == subagent_type
-        ]
+        matching_chains = self._by_type.get(subagent_type, ())
         
         if not matching_chains:
             return None
         
         # Get the latest chain
         latest_chain = matching_chains[-1]
-        messages = latest_chain['messages']
+        messages = latest_chain.messages
+        tool_usage, message_stats, estimated_tokens = self._analyze_chain(latest_chain)
         
         # Build comprehensive info
         info = {
             'subagent_type': subagent_type,
             'occurrence_index': len(matching_chains) - 1,  # Index of this occurrence
             'total_occurrences': len(matching_chains),
-            'description': latest_chain['description'],
-            'task_line': latest_chain['task_line'],
-            'chain_length': latest_chain['chain_length'],
+            'description': latest_chain.description,
+            'task_line': latest_chain.task_line,
+            'chain_length': latest_chain.chain_length,
             'messages': messages,
-            'tool_usage': self.analyze_tool_usage(messages),
-            'message_stats': self.analyze_message_statistics(messages),
-            'estimated_tokens': self.estimate_token_count(messages),
-            'task_timestamp': latest_chain.get('task_timestamp', 0),
-            'root_uuid': latest_chain.get('root_uuid', '')
+            'tool_usage': tool_usage,
+            'message_stats': message_stats,
+            'estimated_tokens': estimated_tokens,
+            'task_timestamp': latest_chain.task_timestamp,
+            'root_uuid': latest_chain.root_uuid
         }
         
         # Add computed stats
@@ -126,75 +247,69 @@ class TranscriptParser:
         
         return info
     
-    def analyze_tool_usage(self, messages: List[Dict[str, Any]]) -> Dict[str, int]:
-        """Analyze tool usage from subagent messages."""
-        tool_usage = Counter()
-        
-        for entry in messages:
-            msg = entry.get('message', {})
-            if msg.get('role') == 'assistant':
-                content = msg.get('content', [])
-                if isinstance(content, list):
-                    for item in content:
-                        if isinstance(item, dict) and item.get('type') == 'tool_use':
-                            tool_name = item.get('name')
-                            if tool_name:
-                                tool_usage[tool_name] += 1
+    @staticmethod
+    def _single_pass(messages: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]], int]:
+        """
+        Compute (tool_usage, message_stats, token_estimate) in one walk over messages.
         
-        return dict(tool_usage)
-    
-    def analyze_message_statistics(self, messages: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
-        """Analyze message statistics by type."""
+        Each message's content is measured once and shared by the message
+        statistics and the token estimate.
+        """
+        tool_usage = defaultdict(int)
         stats = defaultdict(lambda: {'count': 0, 'total_chars': 0})
+        total_chars = 0
+        content_len_of = _content_len
         
         for entry in messages:
-            msg = entry.get('message', {})
+            # Entries without a message still count, under role 'unknown'
+            msg = entry.get('message') or _EMPTY
             role = msg.get('role', 'unknown')
             
             # Calculate content length
             content = msg.get('content', '')
-            if isinstance(content, list):
-                content_str = json.dumps(content)
+            # Exact type tests; decoded JSON never holds subclasses
+            content_type = type(content)
+            if content_type is list:
+                content_len = content_len_of(content)
+                if role == 'assistant':
+                    for item in content:
+                        if type(item) is dict and item.get('type') == 'tool_use':
+                            tool_name = item.get('name')
+                            if tool_name:
+                                tool_usage[tool_name] += 1
+            elif content_type is str:
+                content_len = len(content)
             else:
-                content_str = str(content)
+                content_len = len(str(content))
             
-            stats[role]['count'] += 1
-            stats[role]['total_chars'] += len(content_str)
+            role_stats = stats[role]
+            role_stats['count'] += 1
+            role_stats['total_chars'] += content_len
+            total_chars += content_len
         
         # Calculate averages
-        for role in stats:
-            count = stats[role]['count']
-            if count > 0:
-                stats[role]['avg_chars'] = stats[role]['total_chars'] / count
-            else:
-                stats[role]['avg_chars'] = 0
+        for role_stats in stats.values():
+            count = role_stats['count']
+            role_stats['avg_chars'] = role_stats['total_chars'] / count if count > 0 else 0
         
-        return dict(stats)
+        # Rough approximation: 1 token ≈ 4 characters for English text
+        return dict(tool_usage), dict(stats), total_chars // 4
+    
+    def analyze_tool_usage(self, messages: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Analyze tool usage from subagent messages."""
+        return self._single_pass(messages)[0]
+    
+    def analyze_message_statistics(self, messages: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """Analyze message statistics by type."""
+        return self._single_pass(messages)[1]
     
     def estimate_token_count(self, messages: List[Dict[str, Any]]) -> int:
         """Estimate token count for messages (rough approximation)."""
-        total_chars = 0
-        
-        for entry in messages:
-            msg = entry.get('message', {})
-            content = msg.get('content', '')
-            
-            if isinstance(content, list):
-                content_str = json.dumps(content)
-            else:
-                content_str = str(content)
-            
-            total_chars += len(content_str)
-        
-        # Rough approximation: 1 token ≈ 4 characters for English text
-        return total_chars // 4
+        return self._single_pass(messages)[2]
     
     def get_subagent_summary(self, subagent_type: str) -> Dict[str, Any]:
         """Get comprehensive summary for all invocations of a specific subagent type."""
-        matching_chains = [
-            chain for chain in self.subagent_chains 
-            if chain['subagent_type'] == subagent_type
-        ]
+        matching_chains = self._by_type.get(subagent_type, ())
         
         if not matching_chains:
             return None
@@ -205,45 +320,48 @@ class TranscriptParser:
             'invocations': []
         }
         
+        # Aggregates are accumulated alongside the per-invocation info
+        total_messages = 0
+        total_tokens = 0
+        all_tools = defaultdict(int)
+        
         for i, chain in enumerate(matching_chains):
-            messages = chain['messages']
+            tool_usage, message_stats, estimated_tokens = self._analyze_chain(chain)
             
             invocation_info = {
                 'occurrence': i,
-                'description': chain['description'],
-                'task_line': chain['task_line'],
-                'chain_length': chain['chain_length'],
-                'tool_usage': self.analyze_tool_usage(messages),
-                'message_stats': self.analyze_message_statistics(messages),
-                'estimated_tokens': self.estimate_token_count(messages)
+                'description': chain.description,
+                'task_line': chain.task_line,
+                'chain_length': chain.chain_length,
+                'tool_usage': tool_usage,
+                'message_stats': message_stats,
+                'estimated_tokens': estimated_tokens
             }
             
             # Calculate totals
-            invocation_info['total_tools_used'] = sum(invocation_info['tool_usage'].values())
-            invocation_info['unique_tools_used'] = len(invocation_info['tool_usage'])
+            total_tools_used = 0
+            for tool, count in tool_usage.items():
+                all_tools[tool] += count
+                total_tools_used += count
+            invocation_info['total_tools_used'] = total_tools_used
+            invocation_info['unique_tools_used'] = len(tool_usage)
             
             summary['invocations'].append(invocation_info)
+            total_messages += chain.chain_length
+            total_tokens += estimated_tokens
         
-        # Calculate aggregates
-        summary['total_messages'] = sum(inv['chain_length'] for inv in summary['invocations'])
-        summary['total_tokens_estimated'] = sum(inv['estimated_tokens'] for inv in summary['invocations'])
-        summary['avg_messages_per_invocation'] = summary['total_messages'] / len(matching_chains)
-        
-        # Aggregate tool usage
-        all_tools = Counter()
-        for inv in summary['invocations']:
-            for tool, count in inv['tool_usage'].items():
-                all_tools[tool] += count
+        summary['total_messages'] = total_messages
+        summary['total_tokens_estimated'] = total_tokens
+        summary['avg_messages_per_invocation'] = total_messages / len(matching_chains)
         summary['aggregate_tool_usage'] = dict(all_tools)
         
         return summary
     
     def get_all_subagents_summary(self) -> List[Dict[str, Any]]:
         """Get summary for all unique subagent types."""
-        subagent_types = set(chain['subagent_type'] for chain in self.subagent_chains)
         summaries = []
         
-        for subagent_type in subagent_types:
+        for subagent_type in self._by_type:
             summary = self.get_subagent_summary(subagent_type)
             if summary:
                 summaries.append(summary)
@@ -264,24 +382,16 @@ def parse_transcript_for_subagent_v2(transcript_path: str, subagent_type: str,
     Returns:
         Tuple of (tool_usage, message_stats, token_estimate)
     """
-    parser = TranscriptParser(transcript_path)
+    parser = _get_parser(transcript_path)
+    matching_chains = parser._by_type.get(subagent_type, ())
     
-    if not parser.load_and_reconstruct():
+    if occurrence >= len(matching_chains) or not matching_chains[occurrence].messages:
         return {}, {}, 0
     
-    messages = parser.get_subagent_conversation(subagent_type, occurrence)
-    
-    if not messages:
-        return {}, {}, 0
-    
-    tool_usage = parser.analyze_tool_usage(messages)
-    message_stats = parser.analyze_message_statistics(messages)
-    token_estimate = parser.estimate_token_count(messages)
-    
-    return tool_usage, message_stats, token_estimate
+    return parser._analyze_chain(matching_chains[occurrence])
 
 
-def parse_latest_subagent_conversation(transcript_path: str, subagent_type: str) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]], int]:
+def parse_latest_subagent_conversation(transcript_path: str, subagent_type: str) -> ParseResult:
     """
     Parse transcript and return stats for the LATEST occurrence of a specific subagent.
     
@@ -290,23 +400,71 @@ def parse_latest_subagent_conversation(transcript_path: str, subagent_type: str)
         subagent_type: Type of subagent to analyze
     
     Returns:
-        Tuple of (tool_usage, message_stats, token_estimate)
+        ParseResult tuple of (tool_usage, message_stats, token_estimate)
     """
-    parser = TranscriptParser(transcript_path)
-    
-    if not parser.load_and_reconstruct():
-        return {}, {}, 0
+    latest_chain = _get_latest_chain(transcript_path, subagent_type)
     
-    messages = parser.get_latest_subagent_conversation(subagent_type)
+    if latest_chain is None or not latest_chain.messages:
+        return ParseResult({}, {}, 0)
     
-    if not messages:
-        return {}, {}, 0
+    return ParseResult(*TranscriptParser._single_pass(latest_chain.messages))
+
+
+def parse_token_estimate_only(transcript_path: str, subagent_type: str) -> int:
+    """
+    Estimate the tokens of the LATEST occurrence of a specific subagent,
+    without computing tool usage or message statistics.
     
-    tool_usage = parser.analyze_tool_usage(messages)
-    message_stats = parser.analyze_message_statistics(messages)
-    token_estimate = parser.estimate_token_count(messages)
+    Args:
+        transcript_path: Path to the JSONL transcript file
+        subagent_type: Type of subagent to analyze
     
-    return tool_usage, message_stats, token_estimate
+    Returns:
+        Estimated token count, 0 if there is no such conversation
+    """
+    latest_chain = _get_latest_chain(transcript_path, subagent_type)
+    return _estimate_tokens(latest_chain.messages) if latest_chain is not None else 0
+
+
+@functools.lru_cache(maxsize=8)
+def _load_parser(transcript_path: str, mtime_ns: int, size: int) -> TranscriptParser:
+    """Build and reconstruct a parser; cached for as long as the file is unchanged."""
+    parser = TranscriptParser(transcript_path)
+    parser.load_and_reconstruct()
+    return parser
+
+
+def _get_parser(transcript_path: str) -> TranscriptParser:
+    """
+    Return a reconstructed parser for the transcript, shared between the
+    module-level parse_* functions until the file changes.
+    """
+    try:
+        st = os.stat(transcript_path)
+    except OSError:
+        # Not cacheable; loading fails and leaves the parser empty
+        parser = TranscriptParser(transcript_path)
+        parser.load_and_reconstruct()
+        return parser
+    return _load_parser(transcript_path, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_latest_chain(transcript_path: str, subagent_type: str, mtime_ns: int, size: int) -> Optional[Chain]:
+    """Tail-read the latest chain of a type; cached for as long as the file is unchanged."""
+    return SidechainReconstructor(transcript_path).reconstruct_latest_chain(subagent_type)
+
+
+def _get_latest_chain(transcript_path: str, subagent_type: str) -> Optional[Chain]:
+    """
+    Return the latest chain of a subagent type, read from the end of the
+    transcript rather than reconstructing all of it.
+    """
+    try:
+        st = os.stat(transcript_path)
+    except OSError:
+        return None
+    return _load_latest_chain(transcript_path, subagent_type, st.st_mtime_ns, st.st_size)
 
 
 def test_v2_parser():
@@ -3,171 +3,392 @@
 Comprehensive test of enhanced parser on all transcripts to identify edge cases.
 """
 
+import argparse
 import json
+import mmap
 import time
 import os
 import sys
 import traceback
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+
+# Optional C-accelerated JSON parser; takes the raw bytes of each line
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+def _advise_sequential(f) -> None:
+    """Tell the kernel a file will be read front to back, where supported."""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
 
 sys.path.insert(0, 'template')
 from enhanced_stats_analyzer import EnhancedStatsAnalyzer
-from sidechain_reconstructor import SidechainReconstructor
+from sidechain_reconstructor import READ_BUFFER_SIZE, SidechainReconstructor
 
-def test_transcript(file_path: str) -> dict:
-    """Test parsing a single transcript file and capture any issues."""
-    result = {
+def _file_size(path: str) -> int:
+    """Size of a file in bytes, 0 if it can't be read."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _count_lines(mm: mmap.mmap) -> int:
+    """Number of lines in a non-empty mapped file, scanned a chunk at a time."""
+    newlines = sum(mm[start:start + READ_BUFFER_SIZE].count(b'\n')
+                   for start in range(0, len(mm), READ_BUFFER_SIZE))
+    # A final line without a newline still counts
+    return newlines + (mm[-1:] != b'\n')
+
+# One analyzer per process, reset before each use instead of rebuilt
+_ANALYZER = EnhancedStatsAnalyzer()
+
+# Stats of an empty conversation; shared by results, never modified
+_EMPTY_STATS = EnhancedStatsAnalyzer().analyze_conversation([])
+
+# Report categories as (marker, category), checked in order; warnings are
+# matched case-insensitively, so their markers are lowercase
+_WARNING_CATEGORIES = (
+    ('runtime', 'runtime_issues'),
+    ('turns', 'turn_count_issues'),
+    ('files', 'file_operation_issues'),
+)
+_ERROR_CATEGORIES = (
+    ('JSON decode', 'json_decode'),
+    ('Sidechain reconstruction', 'sidechain_reconstruction'),
+    ('Stats analysis', 'stats_analysis'),
+    ('KeyError', 'key_error'),
+    ('TypeError', 'type_error'),
+)
+
+# A transcript with this many undecodable lines is treated as corrupt:
+# reading stops and its messages are not analyzed
+MAX_DECODE_ERRORS = 10
+
+# Subagent runtimes above this many seconds (24 hours) are reported
+MAX_EXPECTED_RUNTIME = 86400
+
+# Files listed under a warning or error category, only shown when it has no
+# more occurrences than this; and edge cases listed in the summary
+CATEGORY_SAMPLES = 3
+EDGE_CASES_SHOWN = 10
+
+# Files with errors listed in the summary
+PROBLEM_FILES_SHOWN = 5
+
+# Per-file report lines are written out in batches of this many files
+OUTPUT_BATCH_FILES = 64
+
+# Edge-case checks, in the order the report lists them
+EDGE_LARGE_NO_SUBAGENTS, EDGE_MANY_SUBAGENTS, EDGE_VERY_SMALL = range(3)
+
+def _categorize(message: str, categories) -> str:
+    """Return the category of the first marker found in message, or 'other'."""
+    for marker, category in categories:
+        if marker in message:
+            return category
+    return 'other'
+
+def _new_result(file_path: str) -> dict:
+    """The result of testing a transcript, before anything is known about it."""
+    path = Path(file_path)
+    return {
         'file_path': file_path,
+        # Names for the report, computed once here
+        'parent_name': path.parent.name,
+        'display_name': f"{path.parent.name}/{path.name}",
         'status': 'success',
         'messages': 0,
+        # Lines read before giving up on the file, if it was aborted
+        'aborted': False,
+        'messages_processed': 0,
         'subagents': 0,
         'stats': {},
         'errors': [],
         'warnings': []
     }
+
+def _finish_result(result: dict) -> dict:
+    """Set the final status of a result and tag its edge cases."""
+    if result['errors']:
+        result['status'] = 'error'
+    elif result['warnings']:
+        result['status'] = 'warning'
+    
+    # Tag edge cases as (check, description) for the report
+    edge_cases = []
+    if result['subagents'] == 0 and result['messages'] > 100:
+        edge_cases.append((EDGE_LARGE_NO_SUBAGENTS, f"Large transcript with no subagents: {result['parent_name']} ({result['messages']} messages)"))
+    if result['subagents'] > 10:
+        edge_cases.append((EDGE_MANY_SUBAGENTS, f"Many subagents: {result['parent_name']} ({result['subagents']} subagents)"))
+    if result['messages'] < 5:
+        edge_cases.append((EDGE_VERY_SMALL, f"Very small transcript: {result['parent_name']} ({result['messages']} messages)"))
+    result['edge_cases'] = edge_cases
     
+    return result
+
+def _pool_result(future, file_path: str) -> dict:
+    """
+    The result of a test run in the pool. A worker that died (e.g. killed
+    for running out of memory) fails the files it took down with it.
+    """
     try:
-        # Load messages
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
-        result['messages'] = len(lines)
-        
+        return future.result()
+    except BrokenProcessPool as e:
+        result = _new_result(file_path)
+        result['status'] = 'failed'
+        result['errors'].append(f"Fatal error: worker process died: {e}")
+        return _finish_result(result)
+
+def test_transcript(file_path: str) -> dict:
+    """Test parsing a single transcript file and capture any issues."""
+    result = _new_result(file_path)
+    
+    try:
+        # Load messages from a read-only mapping of the file
         messages = []
-        for i, line in enumerate(lines, 1):
-            if line.strip():
-                try:
-                    msg = json.loads(line)
-                    messages.append(msg)
-                except json.JSONDecodeError as e:
-                    result['errors'].append(f"Line {i}: JSON decode error - {e}")
+        line_numbers = []  # Transcript line of each message
+        line_count = 0
+        decode_errors = 0
+        with open(file_path, 'rb') as f:
+            _advise_sequential(f)
+            # An empty file can't be mapped, and has nothing to load
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+        if mm is not None:
+            with mm:
+                # Size the lists from a count of the lines, rather than
+                # growing them one message at a time
+                capacity = _count_lines(mm)
+                messages = [None] * capacity
+                line_numbers = [0] * capacity
+                count = 0
+                for line_count, line in enumerate(iter(mm.readline, b''), 1):
+                    if line.strip():
+                        try:
+                            messages[count] = _json_loads(line)
+                            line_numbers[count] = line_count
+                            count += 1
+                        except json.JSONDecodeError as e:
+                            # Also raised by orjson, whose error subclasses it
+                            result['errors'].append(f"Line {line_count}: JSON decode error - {e}")
+                            decode_errors += 1
+                            if decode_errors >= MAX_DECODE_ERRORS:
+                                result['errors'].append(f"Aborting after {decode_errors} JSON decode errors at line {line_count}")
+                                result['aborted'] = True
+                                count = 0
+                                break
+                del messages[count:]
+                del line_numbers[count:]
+                if result['aborted']:
+                    # Still report the whole transcript's lines, so the
+                    # totals don't silently shrink
+                    line_count, result['messages_processed'] = capacity, line_count
+        result['messages'] = line_count
+        if not result['aborted']:
+            result['messages_processed'] = line_count
         
-        # Try sidechain reconstruction
+        # Try sidechain reconstruction, on the messages parsed above rather
+        # than reading and decoding the file a second time
         try:
-            reconstructor = SidechainReconstructor(file_path)
-            chains = reconstructor.reconstruct_all_subagent_chains()
+            # Every chain starts at a sidechain root, so a transcript without
+            # sidechain messages (the common case) has nothing to reconstruct
+            if any(type(msg) is dict and msg.get('isSidechain', False) for msg in messages):
+                reconstructor = SidechainReconstructor.from_messages(messages, line_numbers, file_path)
+                chains = reconstructor.reconstruct_all_subagent_chains()
+            else:
+                chains = []
             result['subagents'] = len(chains)
             
-            # Analyze each subagent with enhanced stats
-            analyzer = EnhancedStatsAnalyzer()
+            # Analyze each subagent with enhanced stats; the chains of a
+            # transcript share what the analyzer learns about existing files
+            analyzer = _ANALYZER
+            if chains:
+                analyzer.reset()
+            warnings = result['warnings']
             for chain in chains:
+                message_count = len(chain.messages)
+                if message_count < 2:
+                    # A lone root has no runtime or turns to warn about
+                    continue
                 try:
-                    stats = analyzer.analyze_conversation(chain['messages'])
-                    # Check for unusual stats
-                    if stats['total_runtime'] < 0:
-                        result['warnings'].append(f"Negative runtime for {chain['subagent_type']}: {stats['total_runtime']}")
-                    if stats['total_runtime'] > 86400:  # > 24 hours
-                        result['warnings'].append(f"Very long runtime for {chain['subagent_type']}: {stats['total_runtime']/3600:.1f} hours")
-                    if stats['total_turns'] == 0 and len(chain['messages']) > 2:
-                        result['warnings'].append(f"No turns counted for {chain['subagent_type']} with {len(chain['messages'])} messages")
+                    stats = analyzer.analyze_conversation(chain.messages)
+                    # Check for unusual stats; the checks only need these two
+                    runtime = stats['total_runtime']
+                    turns = stats['total_turns']
+                    if runtime < 0:
+                        warnings.append(f"Negative runtime for {chain.subagent_type}: {runtime}")
+                    elif runtime > MAX_EXPECTED_RUNTIME:
+                        warnings.append(f"Very long runtime for {chain.subagent_type}: {runtime/3600:.1f} hours")
+                    if turns == 0 and message_count > 2:
+                        warnings.append(f"No turns counted for {chain.subagent_type} with {message_count} messages")
                 except Exception as e:
-                    result['errors'].append(f"Stats analysis error for {chain['subagent_type']}: {e}")
+                    result['errors'].append(f"Stats analysis error for {chain.subagent_type}: {e}")
             
         except Exception as e:
             result['errors'].append(f"Sidechain reconstruction error: {e}")
         
-        # Test direct stats analysis on main transcript
-        try:
-            analyzer = EnhancedStatsAnalyzer()
-            main_stats = analyzer.analyze_conversation(messages)
-            result['stats'] = main_stats
-            
-            # Edge case checks
-            if main_stats['files_created'] > 1000:
-                result['warnings'].append(f"Unusually high files created: {main_stats['files_created']}")
-            if main_stats['files_deleted'] > main_stats['files_created']:
-                result['warnings'].append(f"More files deleted ({main_stats['files_deleted']}) than created ({main_stats['files_created']})")
+        # Test direct stats analysis on main transcript; nothing to check
+        # (or warn about) without messages
+        if not messages:
+            result['stats'] = _EMPTY_STATS
+        else:
+            try:
+                analyzer = _ANALYZER
+                analyzer.reset()
+                main_stats = analyzer.analyze_conversation(messages)
+                result['stats'] = main_stats
                 
-        except Exception as e:
-            result['errors'].append(f"Main stats analysis error: {e}")
+                # Edge case checks
+                if main_stats['files_created'] > 1000:
+                    result['warnings'].append(f"Unusually high files created: {main_stats['files_created']}")
+                if main_stats['files_deleted'] > main_stats['files_created']:
+                    result['warnings'].append(f"More files deleted ({main_stats['files_deleted']}) than created ({main_stats['files_created']})")
+                    
+            except Exception as e:
+                result['errors'].append(f"Main stats analysis error: {e}")
             
     except Exception as e:
         result['status'] = 'failed'
         result['errors'].append(f"Fatal error: {e}")
         result['traceback'] = traceback.format_exc()
     
-    if result['errors']:
-        result['status'] = 'error'
-    elif result['warnings']:
-        result['status'] = 'warning'
-    
-    return result
+    return _finish_result(result)
 
-def test_all_projects(directory: str, limit: int = None) -> None:
-    """Test all transcript files in the projects directory."""
-    project_dirs = list(Path(directory).iterdir())
+def test_all_projects(directory: str, limit: int = None, workers: int = None,
+                      quiet: bool = False) -> None:
+    """
+    Test all transcript files in the projects directory.
+    
+    Transcripts are tested in parallel on `workers` processes (default: one
+    per CPU); results are reported in the same order as a sequential run.
+    With `quiet`, only the summary is printed.
+    """
+    # scandir's entries carry their name and type from the directory read,
+    # so listing costs no stat() per entry
+    with os.scandir(directory) as it:
+        project_dirs = list(it)
     if limit:
         project_dirs = project_dirs[:limit]
     
-    results = {
-        'success': [],
-        'warning': [],
-        'error': [],
-        'failed': []
-    }
+    # Find all transcript files up front so they can be handed out to workers,
+    # as (project name, file name, path)
+    transcripts = []
+    for project_dir in project_dirs:
+        if not project_dir.is_dir():
+            continue
+        with os.scandir(project_dir.path) as it:
+            transcripts.extend((project_dir.name, entry.name, entry.path)
+                               for entry in it if entry.name.endswith('.jsonl'))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    # The summary is accumulated as results come in, keeping only the few
+    # results it shows rather than all of them
+    status_counts = Counter()
+    problem_files = {'error': [], 'failed': []}  # The first few of each status
+    largest_success = None
+    
+    # Edge cases of successful (or warning) transcripts, kept check by check:
+    # large transcripts with no subagents, transcripts with many subagents,
+    # then very small transcripts. Only the first few of each check can be
+    # shown, so only those are kept
+    cases_by_check = ([], [], [])
+    edge_case_count = 0
     
-    error_types = defaultdict(list)
-    warning_types = defaultdict(list)
+    # Occurrences per category, and the last few files for each
+    error_counts = Counter()
+    error_samples = defaultdict(lambda: deque(maxlen=CATEGORY_SAMPLES))
+    warning_counts = Counter()
+    warning_samples = defaultdict(lambda: deque(maxlen=CATEGORY_SAMPLES))
     total_files = 0
     total_messages = 0
     total_subagents = 0
+    aborted_files = 0
     
     print(f"🔍 Testing enhanced parser on all transcripts in {directory}")
     print("=" * 80)
     
-    for project_dir in project_dirs:
-        if not project_dir.is_dir():
-            continue
-        
-        # Find all transcript files
-        transcripts = list(project_dir.glob("*.jsonl"))
+    paths = [path for _, _, path in transcripts]
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(paths) > 1 else None
+    with pool or nullcontext():
+        if pool:
+            # Each test is independent. Start the largest transcripts first, so
+            # a huge one isn't left running alone at the end of the run, but
+            # report the results in listing order
+            futures = [None] * len(paths)
+            for i in sorted(range(len(paths)), key=lambda i: _file_size(paths[i]), reverse=True):
+                futures[i] = pool.submit(test_transcript, paths[i])
+            test_results = map(_pool_result, futures, paths)
+        else:
+            test_results = map(test_transcript, paths)
         
-        for transcript in transcripts:
+        # Per-file report lines, written to stdout a batch at a time
+        out = []
+        for (project_name, file_name, _), result in zip(transcripts, test_results):
             total_files += 1
-            print(f"\n📁 Testing: {project_dir.name}/{transcript.name}")
             
-            result = test_transcript(str(transcript))
-            results[result['status']].append(result)
+            status = result['status']
+            status_counts[status] += 1
             total_messages += result['messages']
+            aborted_files += result['aborted']
             total_subagents += result['subagents']
             
-            # Print immediate feedback
-            if result['status'] == 'success':
-                print(f"   ✅ Success: {result['messages']} messages, {result['subagents']} subagents")
-            elif result['status'] == 'warning':
-                print(f"   ⚠️  Warning: {result['messages']} messages, {result['subagents']} subagents")
+            if status == 'success' or status == 'warning':
+                for check, case in result['edge_cases']:
+                    edge_case_count += 1
+                    if len(cases_by_check[check]) < EDGE_CASES_SHOWN:
+                        cases_by_check[check].append(case)
+                # The first of the largest, as max() would pick
+                if status == 'success' and (largest_success is None or
+                                            result['messages'] > largest_success['messages']):
+                    largest_success = result
+            elif len(problem_files[status]) < PROBLEM_FILES_SHOWN:
+                problem_files[status].append(result)
+            
+            if status == 'warning':
                 for warning in result['warnings']:
-                    print(f"      - {warning}")
-                    # Categorize warning
-                    if 'runtime' in warning.lower():
-                        warning_types['runtime_issues'].append(result['file_path'])
-                    elif 'turns' in warning.lower():
-                        warning_types['turn_count_issues'].append(result['file_path'])
-                    elif 'files' in warning.lower():
-                        warning_types['file_operation_issues'].append(result['file_path'])
-                    else:
-                        warning_types['other'].append(result['file_path'])
-            elif result['status'] == 'error':
-                print(f"   ❌ Error: {result['messages']} messages, {result['subagents']} subagents")
+                    category = _categorize(warning.lower(), _WARNING_CATEGORIES)
+                    warning_counts[category] += 1
+                    warning_samples[category].append(result['display_name'])
+            elif status == 'error':
                 for error in result['errors']:
-                    print(f"      - {error}")
-                    # Categorize error
-                    if 'JSON decode' in error:
-                        error_types['json_decode'].append(result['file_path'])
-                    elif 'Sidechain reconstruction' in error:
-                        error_types['sidechain_reconstruction'].append(result['file_path'])
-                    elif 'Stats analysis' in error:
-                        error_types['stats_analysis'].append(result['file_path'])
-                    elif 'KeyError' in error:
-                        error_types['key_error'].append(result['file_path'])
-                    elif 'TypeError' in error:
-                        error_types['type_error'].append(result['file_path'])
-                    else:
-                        error_types['other'].append(result['file_path'])
+                    category = _categorize(error, _ERROR_CATEGORIES)
+                    error_counts[category] += 1
+                    error_samples[category].append(result['display_name'])
+            
+            if quiet:
+                continue
+            
+            # Print immediate feedback
+            out.append(f"\n📁 Testing: {project_name}/{file_name}")
+            if status == 'success':
+                out.append(f"   ✅ Success: {result['messages']} messages, {result['subagents']} subagents")
+            elif status == 'warning':
+                out.append(f"   ⚠️  Warning: {result['messages']} messages, {result['subagents']} subagents")
+                out.extend(f"      - {warning}" for warning in result['warnings'])
+            elif status == 'error':
+                out.append(f"   ❌ Error: {result['messages']} messages, {result['subagents']} subagents")
+                out.extend(f"      - {error}" for error in result['errors'])
             else:  # failed
-                print(f"   💀 FATAL: {result.get('errors', ['Unknown error'])[0]}")
+                out.append(f"   💀 FATAL: {result.get('errors', ['Unknown error'])[0]}")
                 if 'traceback' in result:
-                    print(f"      Traceback: {result['traceback'][:200]}...")
+                    out.append(f"      Traceback: {result['traceback'][:200]}...")
+            
+            if total_files % OUTPUT_BATCH_FILES == 0:
+                sys.stdout.write("\n".join(out) + "\n")
+                sys.stdout.flush()
+                out.clear()
+        
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
     
     # Summary Report
     print("\n" + "=" * 80)
@@ -177,74 +398,59 @@ def test_all_projects(directory: str, limit: int = None) -> None:
     print(f"\n📈 Overall Statistics:")
     print(f"   • Files tested: {total_files}")
     print(f"   • Total messages: {total_messages:,}")
+    if aborted_files:
+        print(f"   • Aborted on decode errors: {aborted_files} files (counted by line, not fully parsed)")
     print(f"   • Total subagents found: {total_subagents}")
     print(f"   • Average messages/file: {total_messages/total_files:.1f}" if total_files else "   • No files tested")
     
     print(f"\n📊 Results Distribution:")
-    print(f"   • ✅ Success: {len(results['success'])} files ({len(results['success'])*100/total_files:.1f}%)" if total_files else "   • No files")
-    print(f"   • ⚠️  Warnings: {len(results['warning'])} files ({len(results['warning'])*100/total_files:.1f}%)" if total_files else "")
-    print(f"   • ❌ Errors: {len(results['error'])} files ({len(results['error'])*100/total_files:.1f}%)" if total_files else "")
-    print(f"   • 💀 Failed: {len(results['failed'])} files ({len(results['failed'])*100/total_files:.1f}%)" if total_files else "")
+    print(f"   • ✅ Success: {status_counts['success']} files ({status_counts['success']*100/total_files:.1f}%)" if total_files else "   • No files")
+    print(f"   • ⚠️  Warnings: {status_counts['warning']} files ({status_counts['warning']*100/total_files:.1f}%)" if total_files else "")
+    print(f"   • ❌ Errors: {status_counts['error']} files ({status_counts['error']*100/total_files:.1f}%)" if total_files else "")
+    print(f"   • 💀 Failed: {status_counts['failed']} files ({status_counts['failed']*100/total_files:.1f}%)" if total_files else "")
     
     # Error Analysis
-    if error_types:
+    if error_counts:
         print(f"\n🔴 Error Categories:")
-        for error_type, files in sorted(error_types.items(), key=lambda x: len(x[1]), reverse=True):
-            print(f"   • {error_type}: {len(files)} occurrences")
-            if len(files) <= 3:
-                for f in files[:3]:
-                    print(f"      - {Path(f).parent.name}/{Path(f).name}")
+        for error_type, count in error_counts.most_common():
+            print(f"   • {error_type}: {count} occurrences")
+            if count <= CATEGORY_SAMPLES:
+                for f in error_samples[error_type]:
+                    print(f"      - {f}")
     
     # Warning Analysis
-    if warning_types:
+    if warning_counts:
         print(f"\n⚠️  Warning Categories:")
-        for warning_type, files in sorted(warning_types.items(), key=lambda x: len(x[1]), reverse=True):
-            print(f"   • {warning_type}: {len(files)} occurrences")
-            if len(files) <= 3:
-                for f in files[:3]:
-                    print(f"      - {Path(f).parent.name}/{Path(f).name}")
+        for warning_type, count in warning_counts.most_common():
+            print(f"   • {warning_type}: {count} occurrences")
+            if count <= CATEGORY_SAMPLES:
+                for f in warning_samples[warning_type]:
+                    print(f"      - {f}")
     
     # Edge Cases Found
     print(f"\n🎯 Edge Cases Identified:")
-    edge_cases = []
-    
-    # Check for transcripts with no subagents but many messages
-    for r in results['success'] + results['warning']:
-        if r['subagents'] == 0 and r['messages'] > 100:
-            edge_cases.append(f"Large transcript with no subagents: {Path(r['file_path']).parent.name} ({r['messages']} messages)")
-    
-    # Check for transcripts with many subagents
-    for r in results['success'] + results['warning']:
-        if r['subagents'] > 10:
-            edge_cases.append(f"Many subagents: {Path(r['file_path']).parent.name} ({r['subagents']} subagents)")
-    
-    # Check for very small transcripts
-    for r in results['success'] + results['warning']:
-        if r['messages'] < 5:
-            edge_cases.append(f"Very small transcript: {Path(r['file_path']).parent.name} ({r['messages']} messages)")
+    edge_cases = [case for cases in cases_by_check for case in cases][:EDGE_CASES_SHOWN]
     
     if edge_cases:
-        for i, case in enumerate(edge_cases[:10], 1):
+        for i, case in enumerate(edge_cases, 1):
             print(f"   {i}. {case}")
-        if len(edge_cases) > 10:
-            print(f"   ... and {len(edge_cases) - 10} more edge cases")
+        if edge_case_count > EDGE_CASES_SHOWN:
+            print(f"   ... and {edge_case_count - EDGE_CASES_SHOWN} more edge cases")
     else:
         print("   • No significant edge cases found")
     
     # Files with most issues
-    if results['error'] or results['failed']:
+    if status_counts['error'] or status_counts['failed']:
         print(f"\n🔥 Files Requiring Attention:")
-        problem_files = results['error'] + results['failed']
-        for r in problem_files[:5]:
-            print(f"   • {Path(r['file_path']).parent.name}/{Path(r['file_path']).name}")
+        for r in (problem_files['error'] + problem_files['failed'])[:PROBLEM_FILES_SHOWN]:
+            print(f"   • {r['display_name']}")
             for error in r['errors'][:2]:
                 print(f"      - {error[:100]}...")
     
     # Success stories
-    if results['success']:
-        largest_success = max(results['success'], key=lambda x: x['messages'])
+    if largest_success:
         print(f"\n✨ Largest Successfully Processed:")
-        print(f"   • {Path(largest_success['file_path']).parent.name}/{Path(largest_success['file_path']).name}")
+        print(f"   • {largest_success['display_name']}")
         print(f"     - {largest_success['messages']} messages, {largest_success['subagents']} subagents")
         
         if largest_success['stats']:
@@ -253,9 +459,15 @@ def test_all_projects(directory: str, limit: int = None) -> None:
             print(f"     - File operations: {stats.get('files_created', 0)} created, {stats.get('files_modified', 0)} modified")
 
 if __name__ == "__main__":
-    import sys
-    
-    directory = sys.argv[1] if len(sys.argv) > 1 else os.path.expanduser("~/.claude/projects")
-    limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(description="Test the enhanced parser on all transcripts.")
+    parser.add_argument('directory', nargs='?', default=os.path.expanduser("~/.claude/projects"),
+                        help="projects directory (default: ~/.claude/projects)")
+    parser.add_argument('limit', nargs='?', type=int, default=None,
+                        help="only test the first LIMIT project directories")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: one per CPU; 1 runs in-process)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="print only the summary, not a report per file")
+    args = parser.parse_args()
     
-    test_all_projects(directory, limit)
\ No newline at end of file
+    test_all_projects(args.directory, args.limit, args.workers, args.quiet)
\ No newline at end of file